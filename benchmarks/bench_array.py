@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Compare `OuiDatabase.lookup_array` on a NumPy uint64 array of MACs with
+formatting each MAC as a str and calling `lookup_many`. Needs NumPy.
+"""
+
+__module__ = 'bench_array'
+__script__ = 'bench_array'
+__author__ = 'Todd Wintermute'
+__version__ = '0.0.1'
+__date__ = '2025-07-07'
+
+import argparse
+import pathlib
+import tempfile
+import time
+
+from common import parse_size, write_synthetic_registries
+import ouilookup
+
+
+def parse_arguments():
+    """Creates a help menu and a parser to get cli arguments."""
+    parser = argparse.ArgumentParser(
+        prog=__script__,
+        description=__doc__,
+        epilog='Have a great day!',
+        )
+    parser.add_argument(
+        '-n', '--size',
+        default='10M',
+        help='Number of MACs in the array, e.g. 1M. Default=10M',
+        )
+    parser.add_argument(
+        '--str-size',
+        default='1M',
+        help=(
+            'Number of MACs looked up as str, the rate is the same for '
+            'the whole array. Default=1M'
+            ),
+        )
+    return parser
+
+
+def random_macs(np, oui_dicts, size):
+    """Return a uint64 array of MACs, half of them under an assignment"""
+    rng = np.random.default_rng(size)
+    prefixes = np.array([
+        int(oui, base=16) << 48 - len(oui) * 4
+        for oui_dict in oui_dicts.values() for oui in oui_dict
+        ], dtype=np.uint64)
+    macs = rng.integers(0, 1 << 48, size, dtype=np.uint64)
+    known = rng.random(size) < 0.5
+    macs[known] = (
+        prefixes[rng.integers(0, len(prefixes), known.sum())]
+        | macs[known] & np.uint64(0xfff)
+        )
+    # Clear the multicast and local bits so every MAC is looked up
+    return macs & np.uint64(0xfcffffffffff)
+
+
+def main():
+    """Main entry point for the program"""
+    args = parse_arguments().parse_args()
+    np = ouilookup.import_numpy()
+    size = parse_size(args.size)
+    str_size = min(size, parse_size(args.str_size))
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = pathlib.Path(tmp)
+        files = write_synthetic_registries(tmp)
+        oui_dicts = ouilookup.convert_registry_csv_files(files)
+        ouilookup.write_index_file(oui_dicts, tmp / 'oui.idx')
+        database = ouilookup.OuiDatabase(tmp / 'oui.idx')
+        database.load()
+        macs = random_macs(np, oui_dicts, size)
+        print(f"{'path':<14}  {'MACs':>12}  {'seconds':>8}  {'M/s':>8}")
+        start = time.perf_counter()
+        vids, table = database.lookup_array(macs)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{'lookup_array':<14}  {size:>12,}  {elapsed:>8.2f}  "
+            f"{size / elapsed / 1e6:>8.2f}"
+            )
+        start = time.perf_counter()
+        results = database.lookup_many(
+            f"{mac:012x}" for mac in macs[:str_size].tolist()
+            )
+        elapsed = time.perf_counter() - start
+        print(
+            f"{'lookup_many':<14}  {str_size:>12,}  {elapsed:>8.2f}  "
+            f"{str_size / elapsed / 1e6:>8.2f}"
+            )
+        same = all(
+            result.vendor == table[vid]
+            for result, vid in zip(results, vids[:str_size].tolist())
+            )
+        print(f"same vendors: {same}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""Compare time and peak RSS of the list based and streaming CSV to JSON
+and index builders. Each builder runs in a fresh interpreter.
+"""
+
+__module__ = 'bench_build'
+__script__ = 'bench_build'
+__author__ = 'Todd Wintermute'
+__version__ = '0.0.1'
+__date__ = '2025-07-07'
+
+import argparse
+import array
+import csv
+import json
+import pathlib
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import peak_rss_kib, registry_files, write_synthetic_registries
+import ouilookup
+
+
+def parse_arguments():
+    """Creates a help menu and a parser to get cli arguments."""
+    parser = argparse.ArgumentParser(
+        prog=__script__,
+        description=__doc__,
+        epilog='Have a great day!',
+        )
+    parser.add_argument(
+        '-s', '--scale',
+        type=float,
+        default=10.0,
+        help='Registry sizes relative to the IEEE registries. Default=10',
+        )
+    parser.add_argument(
+        '-n', '--runs',
+        type=int,
+        default=3,
+        help='Number of runs per builder. Default=3',
+        )
+    parser.add_argument(
+        '--child',
+        nargs=2,
+        metavar=('BUILDER', 'DATA_DIR'),
+        help=argparse.SUPPRESS,
+        )
+    return parser
+
+
+# The list based builder as it was before the streaming one, for reference
+def legacy_convert_csv_to_oui_dict(csv_file):
+    """Read every row into a DictReader list, then copy lists on duplicates"""
+    with pathlib.Path(csv_file).open(encoding='utf-8') as f:
+        data = list(csv.DictReader(f))
+    oui_dict = {}
+    for row in data:
+        oui = row['Assignment']
+        org = row['Organization Name']
+        if oui not in oui_dict:
+            oui_dict.update({oui: org})
+        elif isinstance(oui_dict.get(oui), str):
+            oui_dict.update({oui: [oui_dict[oui], org]})
+        else:
+            oui_dict.update({oui: oui_dict[oui] + [org]})
+    return oui_dict
+
+
+def legacy_write_index_file(oui_dicts, file):
+    """Sort a list of tuples per layer and join all sections in memory"""
+    registries = list(oui_dicts)
+    vendor_ids = {}
+    layers = {bits: [] for bits in ouilookup._prefix_bits}
+    for reg_id, registry in enumerate(registries):
+        for oui, org in oui_dicts[registry].items():
+            bits = len(oui) * 4
+            if bits not in layers:
+                continue
+            if isinstance(org, list):
+                org = '\0'.join(org)
+            vid = vendor_ids.setdefault(org, len(vendor_ids))
+            layers[bits].append((int(oui, base=16), vid, reg_id))
+    blob = bytearray()
+    offsets = [0]
+    for org in vendor_ids:
+        blob += org.encode('utf-8')
+        offsets.append(len(blob))
+    sections = []
+    for bits, entries in layers.items():
+        entries.sort()
+        sections += [
+            (f"K{bits}".encode(), array.array(
+                'Q' if bits > 32 else 'I', [key for key, *_ in entries]
+                )),
+            (f"V{bits}".encode(), array.array('I', [e[1] for e in entries])),
+            (f"R{bits}".encode(), array.array('B', [e[2] for e in entries])),
+            ]
+    sections += [
+        (b'REGS', array.array('B', '\0'.join(registries).encode())),
+        (b'SOFF', array.array('I', offsets)),
+        (b'STRS', array.array('B', blob)),
+        ]
+    offset = (
+        ouilookup._index_header.size
+        + ouilookup._index_section.size * len(sections)
+        )
+    table, data = [], bytearray()
+    for tag, arr in sections:
+        data += bytes(-(offset + len(data)) % 8)
+        table.append(ouilookup._index_section.pack(
+            tag.ljust(4), arr.typecode.encode(), offset + len(data), len(arr),
+            ))
+        data += arr.tobytes()
+    header = ouilookup._index_header.pack(
+        ouilookup._index_magic, ouilookup._index_version, len(sections),
+        )
+    return file.write_bytes(header + b''.join(table) + data)
+
+
+def build(builder, data_dir):
+    """Build oui.json and oui.idx in a temp dir with one builder"""
+    files = registry_files(data_dir)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = pathlib.Path(tmp)
+        if builder == 'legacy':
+            oui_dicts = {
+                registry: legacy_convert_csv_to_oui_dict(file)
+                for registry, file in files.items()
+                }
+            ouis_dict = {}
+            for registry_dict in oui_dicts.values():
+                ouis_dict.update(registry_dict)
+            (tmp / 'oui.json').write_text(json.dumps(ouis_dict, indent=1))
+            legacy_write_index_file(oui_dicts, tmp / 'oui.idx')
+        else:
+            oui_dicts = ouilookup.convert_registry_csv_files(files)
+            ouis_dict = {}
+            for registry_dict in oui_dicts.values():
+                ouis_dict.update(registry_dict)
+            ouilookup.write_json_file(ouis_dict, tmp / 'oui.json')
+            ouilookup.write_index_file(oui_dicts, tmp / 'oui.idx')
+    return sum(len(oui_dict) for oui_dict in oui_dicts.values())
+
+
+def run_child(builder, data_dir):
+    """Run one build in this process and print entries, seconds and RSS"""
+    start = time.perf_counter()
+    entries = build(builder, pathlib.Path(data_dir))
+    print(entries, time.perf_counter() - start, peak_rss_kib())
+
+
+def main():
+    """Main entry point for the program"""
+    args = parse_arguments().parse_args()
+    if args.child:
+        run_child(*args.child)
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        write_synthetic_registries(tmp, args.scale)
+        print(
+            f"{'builder':<10}  {'entries':>10}  {'seconds':>8}  "
+            f"{'peak RSS KiB':>12}"
+            )
+        for builder in ['legacy', 'streaming']:
+            runs = []
+            for _ in range(args.runs):
+                out = subprocess.run(
+                    [sys.executable, __file__, '--child', builder, tmp],
+                    capture_output=True, text=True, check=True,
+                    ).stdout.split()
+                runs.append((int(out[0]), float(out[1]), int(out[2])))
+            seconds = statistics.median(run[1] for run in runs)
+            rss = max(run[2] for run in runs)
+            print(
+                f"{builder:<10}  {runs[0][0]:>10,}  {seconds:>8.3f}  "
+                f"{rss:>12,}"
+                )
+
+
+if __name__ == '__main__':
+    main()
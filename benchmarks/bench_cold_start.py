@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Compare cold start time and RSS of the JSON and binary index lookups"""
+
+__module__ = 'bench_cold_start'
+__script__ = 'bench_cold_start'
+__author__ = 'Todd Wintermute'
+__version__ = '0.0.1'
+__date__ = '2025-07-07'
+
+import argparse
+import pathlib
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from common import project_dir, write_synthetic_csv
+import ouilookup
+
+# ru_maxrss survives exec on Linux, so prefer the new process' VmHWM
+child_code = '''
+import pathlib, resource, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {project_dir!r})
+import ouilookup
+loaded = time.perf_counter()
+data = ouilookup.{loader}({file!r})
+org = ouilookup.find_oui_org({oui!r}, data)
+done = time.perf_counter()
+status = pathlib.Path('/proc/self/status')
+if status.exists():
+    hwm = [l for l in status.read_text().splitlines() if l.startswith('VmHWM')]
+    rss = int(hwm[0].split()[1])
+else:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(done - start, done - loaded, rss)
+'''
+
+
+def parse_arguments():
+    """Creates a help menu and a parser to get cli arguments."""
+    parser = argparse.ArgumentParser(
+        prog=__script__,
+        description=__doc__,
+        epilog='Have a great day!',
+        )
+    parser.add_argument(
+        '-n', '--runs',
+        type=int,
+        default=20,
+        help='Number of cold starts per loader. Default=20',
+        )
+    parser.add_argument(
+        '-e', '--entries',
+        type=int,
+        default=35000,
+        help='Number of synthetic OUI assignments. Default=35000',
+        )
+    return parser
+
+
+def cold_start(loader, file, oui):
+    """Run one lookup in a fresh interpreter.
+    Return total seconds, seconds after import and peak RSS in KiB.
+    """
+    code = child_code.format(
+        project_dir=str(project_dir), loader=loader, file=str(file), oui=oui,
+        )
+    out = subprocess.run(
+        [sys.executable, '-c', code],
+        capture_output=True, text=True, check=True,
+        ).stdout.split()
+    return float(out[0]), float(out[1]), int(out[2])
+
+
+def main():
+    """Main entry point for the program"""
+    args = parse_arguments().parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = pathlib.Path(tmp)
+        csv_file = tmp / 'oui.csv'
+        write_synthetic_csv(csv_file, args.entries)
+        ouis_dict = ouilookup.convert_csv_to_oui_dict(csv_file)
+        ouilookup.write_json_file(ouis_dict, tmp / 'oui.json')
+        ouilookup.write_index_file({'MA-L': ouis_dict}, tmp / 'oui.idx')
+        oui = next(iter(ouis_dict))
+        print(
+            f"{'loader':<16}  {'total ms':>10}  {'lookup ms':>10}  "
+            f"{'peak RSS KiB':>12}"
+            )
+        for loader, file in [
+                ('read_json_file', tmp / 'oui.json'),
+                ('read_index_file', tmp / 'oui.idx'),
+                ]:
+            runs = [cold_start(loader, file, oui) for _ in range(args.runs)]
+            total = statistics.median(run[0] for run in runs) * 1000
+            lookup = statistics.median(run[1] for run in runs) * 1000
+            rss = max(run[2] for run in runs)
+            print(f"{loader:<16}  {total:>10.2f}  {lookup:>10.2f}  {rss:>12,}")
+
+
+if __name__ == '__main__':
+    main()
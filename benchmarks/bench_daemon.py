@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Compare p50/p99 lookup latency of one process per lookup and the daemon"""
+
+__module__ = 'bench_daemon'
+__script__ = 'bench_daemon'
+__author__ = 'Todd Wintermute'
+__version__ = '0.0.1'
+__date__ = '2025-07-07'
+
+import argparse
+import pathlib
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from common import project_dir, write_synthetic_csv
+import ouilookup
+
+# Run the CLI in a fresh interpreter against the synthetic data files
+cli_code = '''
+import pathlib, sys
+sys.path.insert(0, {project_dir!r})
+import ouilookup
+ouilookup._user_csv_file = pathlib.Path({tmp!r}) / 'oui.csv'
+ouilookup._user_json_file = pathlib.Path({tmp!r}) / 'oui.json'
+ouilookup._user_index_file = pathlib.Path({tmp!r}) / 'oui.idx'
+sys.argv = [ouilookup.__script__, *sys.argv[1:]]
+ouilookup.main()
+'''
+
+
+def parse_arguments():
+    """Creates a help menu and a parser to get cli arguments."""
+    parser = argparse.ArgumentParser(
+        prog=__script__,
+        description=__doc__,
+        epilog='Have a great day!',
+        )
+    parser.add_argument(
+        '-n', '--requests',
+        type=int,
+        default=200,
+        help='Number of lookups per method. Default=200',
+        )
+    return parser
+
+
+def percentiles(name, samples):
+    """Print p50 and p99 of samples in milliseconds"""
+    samples = sorted(samples)
+    p50 = statistics.median(samples) * 1000
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000
+    print(f"{name:<32}  {p50:>10.3f}  {p99:>10.3f}")
+
+
+def time_calls(func, count):
+    """Return the duration of count calls of func"""
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    """Main entry point for the program"""
+    args = parse_arguments().parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = pathlib.Path(tmp)
+        write_synthetic_csv(tmp_dir / 'oui.csv', 35000)
+        ouis_dict = ouilookup.convert_csv_to_oui_dict(tmp_dir / 'oui.csv')
+        ouilookup.write_json_file(ouis_dict, tmp_dir / 'oui.json')
+        ouilookup.write_index_file({'MA-L': ouis_dict}, tmp_dir / 'oui.idx')
+        ouilookup._user_json_file = tmp_dir / 'oui.json'
+        ouilookup._user_index_file = tmp_dir / 'oui.idx'
+        address = str(tmp_dir / 'bench.sock')
+        if not hasattr(socket, 'AF_UNIX'):
+            address = 'localhost:47475'
+        server = ouilookup.make_daemon(address)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        mac = f"{next(iter(ouis_dict))}123456"
+        code = cli_code.format(project_dir=str(project_dir), tmp=tmp)
+        run = lambda *argv: subprocess.run(
+            [sys.executable, '-c', code, *argv],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, check=True,
+            )
+        count = args.requests
+        print(f"{'method':<32}  {'p50 ms':>10}  {'p99 ms':>10}")
+        percentiles(
+            'process per lookup', time_calls(lambda: run(mac), count // 10),
+            )
+        percentiles(
+            'process per lookup, --connect',
+            time_calls(lambda: run('--connect', address, mac), count // 10),
+            )
+        sock = ouilookup.connect_daemon(address)
+        rfile = sock.makefile('rb')
+        request = f"1\n{mac}\n".encode()
+
+        def socket_lookup():
+            sock.sendall(request)
+            for _ in range(int(rfile.readline())):
+                rfile.readline()
+
+        percentiles('daemon socket request', time_calls(socket_lookup, count))
+        sock.close()
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Measure --extract and --annotate throughput on large free text files of
+`ip neigh`, `show mac address-table` and syslog lines.
+"""
+
+__module__ = 'bench_extract'
+__script__ = 'bench_extract'
+__author__ = 'Todd Wintermute'
+__version__ = '0.0.1'
+__date__ = '2025-07-07'
+
+import argparse
+import os
+import pathlib
+import random
+import tempfile
+import time
+
+from common import parse_size, write_synthetic_registries
+import ouilookup
+
+
+def parse_arguments():
+    """Creates a help menu and a parser to get cli arguments."""
+    parser = argparse.ArgumentParser(
+        prog=__script__,
+        description=__doc__,
+        epilog='Have a great day!',
+        )
+    parser.add_argument(
+        '-s', '--size',
+        default='256M',
+        help='Size of the text file in bytes, e.g. 64M. Default=256M',
+        )
+    parser.add_argument(
+        '-d', '--distinct',
+        type=int,
+        default=20000,
+        help='Number of distinct MACs in the text. Default=20000',
+        )
+    return parser
+
+
+def text_lines(rnd, macs):
+    """Yield free text lines in the styles of common MAC sources"""
+    while True:
+        mac = rnd.choice(macs)
+        colon = ':'.join(mac[i:i + 2] for i in range(0, 12, 2))
+        ip = '.'.join(['10', *(str(rnd.randrange(256)) for _ in range(3))])
+        style = rnd.randrange(4)
+        if style == 0:
+            yield f"{ip} dev eth0 lladdr {colon} REACHABLE\n"
+        elif style == 1:
+            dotted = '.'.join(mac[i:i + 4] for i in range(0, 12, 4))
+            vlan = rnd.randrange(1, 4095)
+            port = rnd.randrange(1, 48)
+            yield f" {vlan:<4}  {dotted}    DYNAMIC     Gi1/0/{port}\n"
+        elif style == 2:
+            dashed = '-'.join(mac[i:i + 2] for i in range(0, 12, 2)).upper()
+            yield (
+                f"Jul  7 12:34:56 sw1 dhcpd[812]: DHCPACK on {ip} to "
+                f"{dashed} via vlan{rnd.randrange(1, 99)}\n"
+                )
+        else:
+            yield (
+                f"Jul  7 12:34:57 host kernel: [12345.678] IN=eth0 OUT= "
+                f"MAC={colon}:00:11:22:33:44:55:08:00 SRC={ip} LEN=60\n"
+                )
+
+
+def write_text_file(file, size, distinct):
+    """Write about size bytes of free text by repeating a random block"""
+    rnd = random.Random(size)
+    macs = [f"{rnd.getrandbits(48):012x}" for _ in range(distinct)]
+    lines = text_lines(rnd, macs)
+    block = ''.join(next(lines) for _ in range(50000)).encode('ascii')
+    with open(file, 'wb') as f:
+        for _ in range(max(1, size // len(block))):
+            f.write(block)
+
+
+def main():
+    """Main entry point for the program"""
+    args = parse_arguments().parse_args()
+    size = parse_size(args.size)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = pathlib.Path(tmp)
+        files = write_synthetic_registries(tmp)
+        oui_dicts = ouilookup.convert_registry_csv_files(files)
+        ouilookup.write_index_file(oui_dicts, tmp / 'oui.idx')
+        database = ouilookup.OuiDatabase(tmp / 'oui.idx')
+        database.load()
+        text_file = tmp / 'text.log'
+        write_text_file(text_file, size, args.distinct)
+        size = text_file.stat().st_size
+        print(f"{'mode':<16}  {'seconds':>8}  {'MiB/s':>8}  {'MACs':>12}")
+        for mode in ['scan', 'extract', 'annotate']:
+            count = 0
+            with open(os.devnull, 'w') as devnull:
+                writer = ouilookup.ReportWriter(
+                    devnull, quiet=True, cache=ouilookup.LookupCache(),
+                    )
+                start = time.perf_counter()
+                chunks = ouilookup.iter_input_chunks(files=[text_file])
+                if mode == 'annotate':
+                    ouilookup.display_annotated(chunks, database, writer)
+                else:
+                    for macs in ouilookup.iter_extracted_batches(chunks):
+                        count += len(macs)
+                        if mode == 'extract':
+                            writer.write_macs(macs, database)
+                elapsed = time.perf_counter() - start
+            count = f"{count:,}" if mode != 'annotate' else '-'
+            print(
+                f"{mode:<16}  {elapsed:>8.2f}  "
+                f"{size / elapsed / (1 << 20):>8.1f}  {count:>12}"
+                )
+
+
+if __name__ == '__main__':
+    main()
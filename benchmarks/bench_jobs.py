@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Measure --jobs scaling of bulk file lookups across worker counts"""
+
+__module__ = 'bench_jobs'
+__script__ = 'bench_jobs'
+__author__ = 'Todd Wintermute'
+__version__ = '0.0.1'
+__date__ = '2025-07-07'
+
+import argparse
+import contextlib
+import os
+import pathlib
+import tempfile
+import time
+
+from common import write_synthetic_csv, write_synthetic_macs
+import ouilookup
+
+
+def parse_arguments():
+    """Creates a help menu and a parser to get cli arguments."""
+    parser = argparse.ArgumentParser(
+        prog=__script__,
+        description=__doc__,
+        epilog='Have a great day!',
+        )
+    parser.add_argument(
+        '-n', '--lines',
+        type=int,
+        default=2_000_000,
+        help='Number of input lines. Default=2000000',
+        )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        nargs='+',
+        default=[1, 2, 4, 8],
+        help='Worker counts to measure. Default=1 2 4 8',
+        )
+    return parser
+
+
+def main():
+    """Main entry point for the program"""
+    args = parse_arguments().parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = pathlib.Path(tmp)
+        write_synthetic_csv(tmp / 'oui.csv', 35000)
+        ouis_dict = ouilookup.convert_csv_to_oui_dict(tmp / 'oui.csv')
+        ouilookup.write_index_file({'MA-L': ouis_dict}, tmp / 'oui.idx')
+        ouilookup._user_index_file = tmp / 'oui.idx'
+        macs_file = tmp / 'macs.txt'
+        write_synthetic_macs(macs_file, args.lines)
+        print(f"{'jobs':>4}  {'seconds':>8}  {'lines/s':>12}  {'speedup':>7}")
+        base = None
+        for jobs in args.jobs:
+            with open(os.devnull, 'w') as devnull:
+                with contextlib.redirect_stdout(devnull):
+                    start = time.perf_counter()
+                    if jobs < 2:
+                        batches = ouilookup.iter_input_batches(
+                            files=[macs_file],
+                            )
+                        ouilookup.display_report_batches(batches)
+                    else:
+                        ouilookup.display_report_jobs(
+                            [macs_file], jobs, ordered=False,
+                            )
+                    elapsed = time.perf_counter() - start
+            base = base or elapsed
+            print(
+                f"{jobs:>4}  {elapsed:>8.2f}  {args.lines / elapsed:>12,.0f}  "
+                f"{base / elapsed:>6.1f}x"
+                )
+
+
+if __name__ == '__main__':
+    main()
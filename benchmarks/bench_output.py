@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Measure report output throughput of each --format"""
+
+__module__ = 'bench_output'
+__script__ = 'bench_output'
+__author__ = 'Todd Wintermute'
+__version__ = '0.0.1'
+__date__ = '2025-07-07'
+
+import argparse
+import os
+import pathlib
+import tempfile
+import time
+
+from common import write_synthetic_macs, write_synthetic_registries
+import ouilookup
+
+
+def parse_arguments():
+    """Creates a help menu and a parser to get cli arguments."""
+    parser = argparse.ArgumentParser(
+        prog=__script__,
+        description=__doc__,
+        epilog='Have a great day!',
+        )
+    parser.add_argument(
+        '-n', '--lines',
+        type=int,
+        default=1_000_000,
+        help='Number of input lines. Default=1000000',
+        )
+    parser.add_argument(
+        '--format',
+        nargs='+',
+        default=list(ouilookup._output_formats),
+        choices=ouilookup._output_formats,
+        dest='fmts',
+        help='Formats to measure. Default=all',
+        )
+    return parser
+
+
+def main():
+    """Main entry point for the program"""
+    args = parse_arguments().parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = pathlib.Path(tmp)
+        files = write_synthetic_registries(tmp)
+        oui_dicts = ouilookup.convert_registry_csv_files(files)
+        ouilookup.write_index_file(oui_dicts, tmp / 'oui.idx')
+        database = ouilookup.OuiDatabase(tmp / 'oui.idx')
+        database.load()
+        macs_file = tmp / 'macs.txt'
+        write_synthetic_macs(macs_file, args.lines)
+        # Look up once so only formatting and writing are timed
+        batches = [
+            database.lookup_many(ouilookup.strip_list_items(batch))
+            for batch in ouilookup.iter_file_batches(macs_file)
+            ]
+        print(
+            f"{'format':<6}  {'seconds':>8}  {'lines/s':>12}  {'MiB/s':>8}"
+            )
+        for fmt in args.fmts:
+            with open(os.devnull, 'w') as devnull:
+                writer = ouilookup.ReportWriter(devnull, fmt, quiet=True)
+                size = 0
+                start = time.perf_counter()
+                for results in batches:
+                    text, rejected = ouilookup.format_results(results, fmt)
+                    writer.write_text(text, rejected)
+                    size += len(text)
+                elapsed = time.perf_counter() - start
+            print(
+                f"{fmt:<6}  {elapsed:>8.3f}  {args.lines / elapsed:>12,.0f}  "
+                f"{size / elapsed / (1 << 20):>8.1f}"
+                )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Compare MAC normalization throughput of the regex helpers and parse_mac"""
+
+__module__ = 'bench_parse'
+__script__ = 'bench_parse'
+__author__ = 'Todd Wintermute'
+__version__ = '0.0.1'
+__date__ = '2025-07-07'
+
+import argparse
+import itertools
+import re
+import string
+import time
+
+from common import project_dir
+import ouilookup
+
+
+def parse_arguments():
+    """Creates a help menu and a parser to get cli arguments."""
+    parser = argparse.ArgumentParser(
+        prog=__script__,
+        description=__doc__,
+        epilog='Have a great day!',
+        )
+    parser.add_argument(
+        '-n', '--lines',
+        type=int,
+        default=1_000_000,
+        help='Number of input lines. Default=1000000',
+        )
+    return parser
+
+
+# The regex based helpers as they were before parse_mac, for reference
+def legacy_remove_separators(mac):
+    """Remove separators with a regex substitution"""
+    return re.sub(rf"[^{string.hexdigits}]", r'', mac)
+
+
+def legacy_std_format(mac, width):
+    """Insert colons with a regex findall"""
+    return ':'.join(
+        re.findall(r'.{1,2}', rf"{legacy_remove_separators(mac):0>{width}}")
+        )
+
+
+def legacy_is_hex(mac, digits):
+    """Validate with a per character check and a range check"""
+    xmac = legacy_remove_separators(mac)
+    if not all([(char in string.hexdigits) for char in xmac]):
+        return False
+    if len(xmac) != digits:
+        return False
+    intmac = int(xmac, base=16)
+    if intmac < 0 or intmac > (1 << digits * 4) - 1:
+        return False
+    return True
+
+
+def legacy_parse(mac):
+    """Validate and format one token the way display_report used to"""
+    if legacy_is_hex(mac, 6):
+        return (
+            legacy_std_format(legacy_remove_separators(mac), 6).upper(),
+            legacy_std_format(f"{legacy_remove_separators(mac):0<12}", 12)
+            .upper(),
+            )
+    elif legacy_is_hex(mac, 12):
+        return (
+            legacy_std_format(legacy_remove_separators(mac)[:6], 6).upper(),
+            legacy_std_format(mac, 12).upper(),
+            )
+    return None
+
+
+def corpus(lines):
+    """Return the example files repeated to the requested number of lines"""
+    examples = project_dir / 'examples'
+    tokens = []
+    for name in ['macs.txt', 'bad.txt']:
+        text = (examples / name).read_text(encoding='utf-8')
+        tokens += [line.strip() for line in text.splitlines()]
+    return list(itertools.islice(itertools.cycle(tokens), lines))
+
+
+def measure(name, func, tokens):
+    """Time func over all tokens and print the throughput"""
+    start = time.perf_counter()
+    func(tokens)
+    elapsed = time.perf_counter() - start
+    rate = len(tokens) / elapsed
+    print(f"{name:<24}  {elapsed:>8.3f} s  {rate:>14,.0f} lines/s")
+    return rate
+
+
+def main():
+    """Main entry point for the program"""
+    args = parse_arguments().parse_args()
+    tokens = corpus(args.lines)
+    legacy = measure(
+        'legacy regex helpers', lambda t: list(map(legacy_parse, t)), tokens,
+        )
+    single = measure(
+        'parse_mac', lambda t: [ouilookup.parse_mac(m) for m in t], tokens,
+        )
+    batch = measure('parse_macs', ouilookup.parse_macs, tokens)
+    print(
+        f"speedup: {single / legacy:.1f}x single, "
+        f"{batch / legacy:.1f}x batch"
+        )
+
+
+if __name__ == '__main__':
+    main()
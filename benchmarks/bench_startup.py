@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Track CLI startup cost: import time, imported modules and a full lookup.
+Results can be appended to a JSON lines file to compare over time.
+"""
+
+__module__ = 'bench_startup'
+__script__ = 'bench_startup'
+__author__ = 'Todd Wintermute'
+__version__ = '0.0.1'
+__date__ = '2025-07-07'
+
+import argparse
+import datetime
+import json
+import pathlib
+import py_compile
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import project_dir, write_synthetic_csv
+import ouilookup
+from bench_daemon import cli_code
+
+
+def parse_arguments():
+    """Creates a help menu and a parser to get cli arguments."""
+    parser = argparse.ArgumentParser(
+        prog=__script__,
+        description=__doc__,
+        epilog='Have a great day!',
+        )
+    parser.add_argument(
+        '-n', '--runs',
+        type=int,
+        default=20,
+        help='Number of fresh interpreters per measurement. Default=20',
+        )
+    parser.add_argument(
+        '-o', '--output',
+        metavar='file.jsonl',
+        type=pathlib.Path,
+        help='Append the results as one JSON line to this file.',
+        )
+    return parser
+
+
+def import_time():
+    """Import ouilookup with -X importtime.
+    Return its cumulative import time in seconds and the modules imported.
+    """
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import ouilookup'],
+        cwd=project_dir, capture_output=True, text=True, check=True,
+        ).stderr
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        if cumulative_us.strip().isdigit():
+            modules[name.strip()] = int(cumulative_us) / 1e6
+    return modules['ouilookup'], sorted(modules)
+
+
+def lookup_time(code, mac):
+    """Run a one MAC lookup in a fresh interpreter. Return seconds"""
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, '-c', code, mac],
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, check=True,
+        )
+    return time.perf_counter() - start
+
+
+def main():
+    """Main entry point for the program"""
+    args = parse_arguments().parse_args()
+    # Measure with bytecode cached, as an installed package would be
+    py_compile.compile(str(project_dir / 'ouilookup.py'), doraise=True)
+    runs = [import_time() for _ in range(args.runs)]
+    modules = runs[0][1]
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = pathlib.Path(tmp)
+        write_synthetic_csv(tmp_dir / 'oui.csv', 35000)
+        ouis_dict = ouilookup.convert_csv_to_oui_dict(tmp_dir / 'oui.csv')
+        ouilookup.write_json_file(ouis_dict, tmp_dir / 'oui.json')
+        ouilookup.write_index_file({'MA-L': ouis_dict}, tmp_dir / 'oui.idx')
+        code = cli_code.format(project_dir=str(project_dir), tmp=tmp)
+        mac = f"{next(iter(ouis_dict))}123456"
+        lookups = [lookup_time(code, mac) for _ in range(args.runs)]
+    result = {
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'version': ouilookup.__version__,
+        'python': sys.version.split()[0],
+        'import_ms': round(statistics.median(t for t, m in runs) * 1000, 3),
+        'imported_modules': len(modules),
+        'lookup_ms': round(statistics.median(lookups) * 1000, 3),
+        }
+    for key, value in result.items():
+        print(f"{key:<18}  {value}")
+    if args.output:
+        with args.output.open('a', encoding='utf-8') as f:
+            f.write(json.dumps(result) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Compare vendor searches served by the n-gram index with a scan of every
+assignment in `oui.json`, the way `grep -i` finds them today.
+"""
+
+__module__ = 'bench_vendor'
+__script__ = 'bench_vendor'
+__author__ = 'Todd Wintermute'
+__version__ = '0.0.1'
+__date__ = '2025-07-07'
+
+import argparse
+import pathlib
+import statistics
+import tempfile
+import time
+
+from common import write_synthetic_registries
+import ouilookup
+
+
+def parse_arguments():
+    """Creates a help menu and a parser to get cli arguments."""
+    parser = argparse.ArgumentParser(
+        prog=__script__,
+        description=__doc__,
+        epilog='Have a great day!',
+        )
+    parser.add_argument(
+        '-s', '--scale',
+        type=float,
+        default=1.0,
+        help='Registry sizes relative to the IEEE registries. Default=1',
+        )
+    parser.add_argument(
+        '-n', '--runs',
+        type=int,
+        default=50,
+        help='Number of runs per pattern. Default=50',
+        )
+    parser.add_argument(
+        'patterns',
+        nargs='*',
+        default=['cisco', 'tp link 12', '^espressif', 'corporation$', 'ub'],
+        help='Vendor search patterns',
+        )
+    return parser
+
+
+def scan_json(ouis_dict, pattern):
+    """Return the assignments whose org holds pattern, ignoring case"""
+    pattern = pattern.casefold()
+    return [
+        oui for oui, org in ouis_dict.items()
+        if pattern in str(org).casefold()
+        ]
+
+
+def median_ms(func, runs):
+    """Return the median time of func in milliseconds and its result"""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000, result
+
+
+def main():
+    """Main entry point for the program"""
+    args = parse_arguments().parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = pathlib.Path(tmp)
+        files = write_synthetic_registries(tmp, args.scale)
+        oui_dicts = ouilookup.convert_registry_csv_files(files)
+        ouis_dict = {}
+        for registry_dict in oui_dicts.values():
+            ouis_dict.update(registry_dict)
+        ouilookup.write_json_file(ouis_dict, tmp / 'oui.json')
+        size = ouilookup.write_index_file(oui_dicts, tmp / 'oui.idx')
+        print(f"{len(ouis_dict):,} assignments, index {size:,} bytes")
+        json_dict = ouilookup.read_json_file(tmp / 'oui.json')
+        database = ouilookup.OuiDatabase(tmp / 'oui.idx')
+        database.load()
+        index = database.data
+        print(
+            f"{'pattern':<16}  {'found':>6}  {'json scan ms':>12}  "
+            f"{'index ids ms':>12}  {'search_vendor ms':>16}"
+            )
+        for pattern in args.patterns:
+            scan, _ = median_ms(
+                lambda: scan_json(json_dict, pattern.strip('^$')), args.runs,
+                )
+            ids, _ = median_ms(
+                lambda: index.search_vendors(pattern), args.runs,
+                )
+            rows, found = median_ms(
+                lambda: database.search_vendor(pattern), args.runs,
+                )
+            print(
+                f"{pattern:<16}  {len(found):>6}  {scan:>12.3f}  "
+                f"{ids:>12.3f}  {rows:>16.3f}"
+                )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""Shared helpers for the benchmarks: synthetic data and measurements.
+Everything is generated locally so the benchmarks run offline.
+"""
+
+import itertools
+import pathlib
+import random
+import sys
+
+project_dir = pathlib.Path(__file__).resolve().parents[1]
+if str(project_dir) not in sys.path:
+    sys.path.insert(0, str(project_dir))
+
+csv_header = 'Registry,Assignment,Organization Name,Organization Address'
+# Registry: (assignments, hex digits) roughly as published by IEEE
+registry_sizes = {
+    'MA-L': (38000, 6),
+    'MA-M': (6000, 7),
+    'MA-S': (7000, 9),
+    'IAB': (4500, 9),
+    'CID': (200, 6),
+    }
+vendor_words = [
+    'Cisco', 'Espressif', 'Ubiquiti', 'Apple', 'Intel', 'Samsung', 'Huawei',
+    'Dell', 'Juniper', 'Aruba', 'Raspberry', 'Netgear', 'TP-Link', 'Sony',
+    ]
+vendor_suffixes = ['Inc.', 'Systems, Inc', 'Corporation', 'Ltd', 'Co.,Ltd']
+
+
+def parse_size(text):
+    """Takes a size like 1000, 1k or 10M. Returns an int"""
+    text = text.strip().lower()
+    scale = {'k': 1_000, 'm': 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip('km')) * scale)
+
+
+def write_synthetic_csv(file, entries, registry='MA-L', digits=6, seed=None):
+    """Write an IEEE shaped registry CSV with random assignments"""
+    rnd = random.Random(f"{registry}{entries}" if seed is None else seed)
+    lines = [csv_header]
+    for key in rnd.sample(range(1 << digits * 4), entries):
+        vendor = (
+            f"{rnd.choice(vendor_words)} {rnd.randrange(entries // 4 + 1)} "
+            f"{rnd.choice(vendor_suffixes)}"
+            )
+        lines.append(
+            f'{registry},{key:0{digits}X},"{vendor}",'
+            f'"{rnd.randrange(9999)} Main St  Town  CA  90000 US"'
+            )
+    pathlib.Path(file).write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+
+def write_synthetic_registries(directory, scale=1.0):
+    """Write a CSV for every IEEE registry. Return registry: file pairs"""
+    import ouilookup
+    directory = pathlib.Path(directory)
+    files = {}
+    for registry, (entries, digits) in registry_sizes.items():
+        csv_file = directory / ouilookup._ieee_registries[registry][0].name
+        write_synthetic_csv(
+            csv_file, max(1, int(entries * scale)), registry, digits,
+            )
+        files[registry] = csv_file
+    return files
+
+
+def example_lines():
+    """Return the lines of the example files shipped with the project"""
+    lines = []
+    for name in ['macs.txt', 'bad.txt']:
+        text = (project_dir / 'examples' / name).read_text(encoding='utf-8')
+        lines += text.splitlines()
+    return lines
+
+
+def write_synthetic_macs(file, lines, seed=None):
+    """Write MACs one per line in the mixed styles of `examples/macs.txt`
+    and `examples/bad.txt`: random MACs in several separator styles, OUIs,
+    and about 5% invalid lines.
+    """
+    rnd = random.Random(lines if seed is None else seed)
+    styles = [
+        lambda h: ':'.join(h[i:i + 2] for i in range(0, 12, 2)),
+        lambda h: '-'.join(h[i:i + 2] for i in range(0, 12, 2)).upper(),
+        lambda h: '.'.join(h[i:i + 4] for i in range(0, 12, 4)),
+        lambda h: '  '.join(h[i:i + 2] for i in range(0, 12, 2)),
+        lambda h: f"{h[:6]}-{h[6:]}",
+        lambda h: h[:6],
+        lambda h: h,
+        ]
+    examples = itertools.cycle(example_lines())
+    with pathlib.Path(file).open('w', encoding='utf-8') as f:
+        for i in range(lines):
+            if rnd.random() < 0.05:
+                f.write(next(examples) + '\n')
+            else:
+                mac = f"{rnd.getrandbits(48):012x}"
+                f.write(rnd.choice(styles)(mac) + '\n')
+
+
+def peak_rss_kib():
+    """Return the peak resident set size of this process in KiB.
+    ru_maxrss survives exec on Linux, so prefer the process' own VmHWM.
+    """
+    status = pathlib.Path('/proc/self/status')
+    if status.exists():
+        for line in status.read_text().splitlines():
+            if line.startswith('VmHWM'):
+                return int(line.split()[1])
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+
+def registry_files(directory):
+    """Return registry: file pairs for the registry CSVs in directory"""
+    import ouilookup
+    return {
+        registry: pathlib.Path(directory) / csv_file.name
+        for registry, (csv_file, url, bits)
+        in ouilookup._ieee_registries.items()
+        }
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Compare two run_benchmarks.py result files stage by stage"""
+
+__module__ = 'compare_benchmarks'
+__script__ = 'compare_benchmarks'
+__author__ = 'Todd Wintermute'
+__version__ = '0.0.1'
+__date__ = '2025-07-07'
+
+import argparse
+import json
+import pathlib
+
+
+def parse_arguments():
+    """Creates a help menu and a parser to get cli arguments."""
+    parser = argparse.ArgumentParser(
+        prog=__script__,
+        description=__doc__,
+        epilog='Have a great day!',
+        )
+    parser.add_argument(
+        'baseline',
+        type=pathlib.Path,
+        help='The results file to compare against.',
+        )
+    parser.add_argument(
+        'candidate',
+        type=pathlib.Path,
+        help='The newer results file.',
+        )
+    return parser
+
+
+def keyed_results(file):
+    """Read a results file. Return a dict of (stage, size): result"""
+    document = json.loads(file.read_text(encoding='utf-8'))
+    return {
+        (result['stage'], result['size']): result
+        for result in document['results']
+        }
+
+
+def ratio(new, old):
+    """Return new / old formatted as a factor, or '-'"""
+    if not new or not old:
+        return '-'
+    return f"{new / old:.2f}x"
+
+
+def main():
+    """Main entry point for the program"""
+    args = parse_arguments().parse_args()
+    baseline = keyed_results(args.baseline)
+    candidate = keyed_results(args.candidate)
+    print(
+        f"{'stage':<12}  {'lines':>11}  {'throughput':>10}  {'time':>8}  "
+        f"{'peak RSS':>8}"
+        )
+    for key in [key for key in candidate if key in baseline]:
+        old, new = baseline[key], candidate[key]
+        stage, size = key
+        size = f"{size:,}" if size is not None else '-'
+        print(
+            f"{stage:<12}  {size:>11}  "
+            f"{ratio(new['items_per_second'], old['items_per_second']):>10}  "
+            f"{ratio(new['seconds'], old['seconds']):>8}  "
+            f"{ratio(new['peak_rss_kib'], old['peak_rss_kib']):>8}"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""Run the benchmark suite offline and save the results as JSON.
+Each stage runs in a fresh interpreter so its peak RSS is its own.
+"""
+
+__module__ = 'run_benchmarks'
+__script__ = 'run_benchmarks'
+__author__ = 'Todd Wintermute'
+__version__ = '0.0.1'
+__date__ = '2025-07-07'
+
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import pathlib
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import common
+import ouilookup
+
+
+def parse_arguments():
+    """Creates a help menu and a parser to get cli arguments."""
+    parser = argparse.ArgumentParser(
+        prog=__script__,
+        description=__doc__,
+        epilog='Have a great day!',
+        )
+    parser.add_argument(
+        '-v', '--version',
+        action='version',
+        version=f"%(prog)s: {__version__} ({__date__})",
+        help='Show the version number and exit',
+        )
+    parser.add_argument(
+        '-s', '--sizes',
+        nargs='+',
+        default=['1k', '1M', '10M'],
+        help='Input corpus sizes in lines. Default=1k 1M 10M',
+        )
+    parser.add_argument(
+        '-t', '--stages',
+        nargs='+',
+        choices=list(stages),
+        default=list(stages),
+        help='Stages to run. Default=all',
+        )
+    parser.add_argument(
+        '-d', '--data-dir',
+        type=pathlib.Path,
+        help=(
+            'Keep the generated corpora and registry in this directory '
+            'to reuse them between runs. Default=a temporary directory'
+            ),
+        )
+    parser.add_argument(
+        '-o', '--output',
+        metavar='results.json',
+        type=pathlib.Path,
+        help='Save the results to this file.',
+        )
+    parser.add_argument(
+        '--child',
+        nargs=3,
+        metavar=('STAGE', 'SIZE', 'DATA_DIR'),
+        help=argparse.SUPPRESS, # Hidden. Runs one stage and prints JSON.
+        )
+    return parser
+
+
+def timed_batches(data_dir, size, func):
+    """Call func on each batch of the corpus, timing only func.
+    Return the number of lines and the seconds spent.
+    """
+    corpus = data_dir / f"macs-{size}.txt"
+    items, seconds = 0, 0.0
+    for batch in ouilookup.iter_file_batches(corpus):
+        start = time.perf_counter()
+        func(batch)
+        seconds += time.perf_counter() - start
+        items += len(batch)
+    return items, seconds, {}
+
+
+def stage_normalize(data_dir, size):
+    """The separator removal and validation helpers"""
+    def normalize(batch):
+        for mac in batch:
+            ouilookup.remove_separators(mac)
+            ouilookup.is_mac(mac)
+            ouilookup.is_oui(mac)
+    return timed_batches(data_dir, size, normalize)
+
+
+def stage_parse(data_dir, size):
+    """Single pass parsing with parse_macs"""
+    return timed_batches(data_dir, size, ouilookup.parse_macs)
+
+
+def stage_find(data_dir, size):
+    """find_oui_org against the index for every valid OUI"""
+    index = ouilookup.OuiIndex(data_dir / 'oui.idx')
+    corpus = data_dir / f"macs-{size}.txt"
+    items, seconds = 0, 0.0
+    for batch in ouilookup.iter_file_batches(corpus):
+        ouis = [parsed.oui for parsed in ouilookup.parse_macs(batch) if parsed]
+        start = time.perf_counter()
+        for oui in ouis:
+            ouilookup.find_oui_org(oui, index)
+        seconds += time.perf_counter() - start
+        items += len(ouis)
+    return items, seconds, {}
+
+
+def stage_lookup(data_dir, size):
+    """Parse and longest prefix lookup with OuiDatabase.lookup_many"""
+    database = ouilookup.OuiDatabase(data_dir / 'oui.idx')
+    database.load()
+    return timed_batches(data_dir, size, database.lookup_many)
+
+
+def stage_report(data_dir, size):
+    """Lookup, rendering and writing of the text report"""
+    database = ouilookup.OuiDatabase(data_dir / 'oui.idx')
+    database.load()
+    with open(os.devnull, 'w') as devnull:
+        writer = ouilookup.ReportWriter(devnull, quiet=True)
+        def report(batch):
+            writer.write(database.lookup_many(batch))
+        return timed_batches(data_dir, size, report)
+
+
+def stage_convert(data_dir, size):
+    """convert_csv_to_oui_dict of the synthetic MA-L registry"""
+    start = time.perf_counter()
+    oui_dict = ouilookup.convert_csv_to_oui_dict(data_dir / 'oui.csv')
+    return len(oui_dict), time.perf_counter() - start, {}
+
+
+def stage_index_build(data_dir, size):
+    """Build the binary index from all synthetic registries"""
+    start = time.perf_counter()
+    oui_dicts = ouilookup.convert_registry_csv_files(
+        common.registry_files(data_dir),
+        )
+    with tempfile.TemporaryDirectory() as tmp:
+        ouilookup.write_index_file(oui_dicts, pathlib.Path(tmp) / 'oui.idx')
+    items = sum(len(oui_dict) for oui_dict in oui_dicts.values())
+    return items, time.perf_counter() - start, {}
+
+
+def load_and_lookup(loader, file):
+    """Load data with loader and look one OUI up. Return seconds"""
+    start = time.perf_counter()
+    data = loader(file)
+    ouilookup.find_oui_org('000000', data)
+    return time.perf_counter() - start
+
+
+def stage_index_load(data_dir, size):
+    """Cold (first in process) and warm loads of the binary index"""
+    cold = load_and_lookup(ouilookup.read_index_file, data_dir / 'oui.idx')
+    warm = [
+        load_and_lookup(ouilookup.read_index_file, data_dir / 'oui.idx')
+        for _ in range(50)
+        ]
+    warm = statistics.median(warm)
+    return 1, cold, {'cold_ms': cold * 1000, 'warm_ms': warm * 1000}
+
+
+def stage_json_load(data_dir, size):
+    """Cold (first in process) and warm loads of oui.json"""
+    cold = load_and_lookup(ouilookup.read_json_file, data_dir / 'oui.json')
+    warm = [
+        load_and_lookup(ouilookup.read_json_file, data_dir / 'oui.json')
+        for _ in range(5)
+        ]
+    warm = statistics.median(warm)
+    return 1, cold, {'cold_ms': cold * 1000, 'warm_ms': warm * 1000}
+
+
+# Stage name: (function, True if it runs once per corpus size)
+stages = {
+    'normalize': (stage_normalize, True),
+    'parse': (stage_parse, True),
+    'find_oui_org': (stage_find, True),
+    'lookup': (stage_lookup, True),
+    'report': (stage_report, True),
+    'convert': (stage_convert, False),
+    'index_build': (stage_index_build, False),
+    'index_load': (stage_index_load, False),
+    'json_load': (stage_json_load, False),
+    }
+
+
+def prepare_data(data_dir, sizes):
+    """Generate the registry, its JSON and index, and the corpora once"""
+    files = common.registry_files(data_dir)
+    if not all(file.exists() for file in files.values()):
+        print(f"Generating synthetic registries in `{data_dir}`")
+        common.write_synthetic_registries(data_dir)
+    if not (data_dir / 'oui.idx').exists():
+        oui_dicts = ouilookup.convert_registry_csv_files(files)
+        ouis_dict = {}
+        for registry_dict in oui_dicts.values():
+            ouis_dict.update(registry_dict)
+        ouilookup.write_json_file(ouis_dict, data_dir / 'oui.json')
+        ouilookup.write_index_file(oui_dicts, data_dir / 'oui.idx')
+    for size in sizes:
+        corpus = data_dir / f"macs-{size}.txt"
+        if not corpus.exists():
+            print(f"Generating corpus `{corpus.name}`")
+            common.write_synthetic_macs(corpus, size)
+
+
+def run_child(stage, size, data_dir):
+    """Run one stage in this process and print its result as JSON"""
+    func, per_size = stages[stage]
+    items, seconds, extra = func(pathlib.Path(data_dir), int(size))
+    print(json.dumps({
+        'stage': stage,
+        'size': int(size) if per_size else None,
+        'items': items,
+        'seconds': seconds,
+        'items_per_second': items / seconds if seconds else None,
+        'peak_rss_kib': common.peak_rss_kib(),
+        **extra,
+        }))
+
+
+def run_stage(stage, size, data_dir):
+    """Run one stage in a fresh interpreter. Return its result dict"""
+    out = subprocess.run(
+        [sys.executable, __file__, '--child', stage, str(size), str(data_dir)],
+        capture_output=True, text=True, check=True,
+        ).stdout
+    return json.loads(out.splitlines()[-1])
+
+
+def print_result(result):
+    """Print one result as a table row"""
+    size = f"{result['size']:,}" if result['size'] is not None else '-'
+    rate = result['items_per_second']
+    rate = f"{rate:,.0f}" if rate else '-'
+    extra = ''
+    if 'cold_ms' in result:
+        extra = (
+            f"cold {result['cold_ms']:.2f} ms, "
+            f"warm {result['warm_ms']:.2f} ms"
+            )
+    print(
+        f"{result['stage']:<12}  {size:>11}  {result['seconds']:>9.3f}  "
+        f"{rate:>14}  {result['peak_rss_kib']:>10,}  {extra}"
+        )
+
+
+def run_suite(args, data_dir):
+    """Run the selected stages. Return the results document"""
+    sizes = [common.parse_size(size) for size in args.sizes]
+    prepare_data(data_dir, sizes)
+    results = []
+    print(
+        f"{'stage':<12}  {'lines':>11}  {'seconds':>9}  {'items/s':>14}  "
+        f"{'peak KiB':>10}"
+        )
+    for stage in args.stages:
+        func, per_size = stages[stage]
+        for size in (sizes if per_size else [0]):
+            result = run_stage(stage, size, data_dir)
+            print_result(result)
+            results.append(result)
+    return {
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'ouilookup_version': ouilookup.__version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+        }
+
+
+def main():
+    """Main entry point for the program"""
+    args = parse_arguments().parse_args()
+    if args.child:
+        run_child(*args.child)
+        return
+    with contextlib.ExitStack() as stack:
+        data_dir = args.data_dir
+        if data_dir is None:
+            data_dir = pathlib.Path(
+                stack.enter_context(tempfile.TemporaryDirectory())
+                )
+        data_dir.mkdir(parents=True, exist_ok=True)
+        document = run_suite(args, data_dir)
+    if args.output:
+        args.output.write_text(json.dumps(document, indent=1) + '\n')
+        print(f"Saved results to `{args.output}`")
+
+
+if __name__ == '__main__':
+    main()
@@ -14,49 +14,92 @@ __info__ = (
     'for MAC addresses'
     )
 
+# Only what plain lookups need is imported here. Downloading, CSV
+# conversion, the daemon, --jobs, completion and interactive mode import
+# their modules when they are used.
 import argparse
-import csv
-import datetime
-import importlib.resources
-import json
+import array
+import bisect
+import collections
+import functools
+import itertools
+import math
+import mmap
+import operator
 import os
 import pathlib
-import re
-import shlex
 import string
+import struct
 import sys
-import urllib.request
-try:
-    # Set interactive mode input history (posix systems only)
-    import readline
-except:
-    readline = None
+import threading
+import time
 
 
 def get_config_location():
-    """Return the location of the user config directory per platform"""
+    """Return the location of the user config directory per platform.
+    The directory is created by `make_config_dir` when something is saved.
+    """
     if sys.platform == 'win32':
         appdata_dir = pathlib.Path(os.getenv('APPDATA'))
         conf_dir = appdata_dir / __script__
     else:
         home_dir = pathlib.Path.home()
         conf_dir = home_dir / '.local' / 'share' / __script__
-    if not all([conf_dir.exists(),conf_dir.is_dir()]):
-        conf_dir.mkdir(parents=True, exist_ok=True)
     return conf_dir
 
 
+def make_config_dir():
+    """Create the user config directory if needed. Return it"""
+    if not all([_user_config_dir.exists(), _user_config_dir.is_dir()]):
+        _user_config_dir.mkdir(parents=True, exist_ok=True)
+    return _user_config_dir
+
+
 _user_config_dir = get_config_location()
 _user_csv_file = _user_config_dir / 'oui.csv'
 _user_json_file = _user_config_dir / 'oui.json'
+_user_index_file = _user_config_dir / 'oui.idx'
+# HTTP validators (ETag, Last-Modified) of the last download of each URL
+_user_download_file = _user_config_dir / 'downloads.json'
+# `--compile` sources, highest priority first
+_user_sources_file = _user_config_dir / 'sources.json'
+# Index shipped inside the package, built by `make` at release time
+_bundled_index = 'oui.idx'
+_default_daemon_address = (
+    str(_user_config_dir / f"{__script__}.sock")
+    if sys.platform != 'win32' else 'localhost:47474'
+    )
 _ieee_csv_url = "https://standards-oui.ieee.org/oui/oui.csv"
 _ieee_txt_url = "https://standards-oui.ieee.org/oui/oui.txt"
+# IEEE registries: registry name -> (user csv file, url, prefix length bits)
+_ieee_registries = {
+    'MA-L': (_user_csv_file, _ieee_csv_url, 24),
+    'MA-M': (
+        _user_config_dir / 'mam.csv',
+        "https://standards-oui.ieee.org/oui28/mam.csv",
+        28,
+        ),
+    'MA-S': (
+        _user_config_dir / 'oui36.csv',
+        "https://standards-oui.ieee.org/oui36/oui36.csv",
+        36,
+        ),
+    'IAB': (
+        _user_config_dir / 'iab.csv',
+        "https://standards-oui.ieee.org/iab/iab.csv",
+        36,
+        ),
+    'CID': (
+        _user_config_dir / 'cid.csv',
+        "https://standards-oui.ieee.org/cid/cid.csv",
+        24,
+        ),
+    }
 
 
-def completion_parse_arguments():
-    """Create command line arguments for shell completion"""
-    completion_parser = argparse.ArgumentParser(add_help=False)
-    completion_group = completion_parser.add_argument_group(
+def add_completion_arguments(parser):
+    """Add command line arguments for shell completion"""
+    completion_group = parser.add_argument_group(
         title='shell completion options',
         )
     completion_group.add_argument(
@@ -64,13 +107,12 @@ def completion_parse_arguments():
         choices=['bash', 'zsh', 'fish'],
         help=f"print {__script__} shell completion to the terminal and exit",
         )
-    return completion_parser
+    return parser
 
 
-def download_parser_arguments():
-    """Create command line arguments for download option"""
-    download_parser = argparse.ArgumentParser(add_help=False)
-    download_group = download_parser.add_argument_group(
+def add_download_arguments(parser):
+    """Add command line arguments for download option"""
+    download_group = parser.add_argument_group(
         title='download IEEE OUI file',
         )
     download_group.add_argument(
@@ -78,19 +120,107 @@ def download_parser_arguments():
         '-d',
         action='store_true',
         help=(
-            f"download the IEEE OUI file `oui.csv` and save to "
+            f"download the IEEE OUI file `oui.csv` and the MA-M, MA-S, "
+            f"IAB and CID registry files and save to "
             f"`{{HOME}}/.local/share/{__script__}` on Linux or "
-            f"`{{APPDATA}}\\{__script__}` on Windows as `oui.csv`. "
-            f"Also convert CSV to JSON and save as `oui.json`"
+            f"`{{APPDATA}}\\{__script__}` on Windows. "
+            f"Also convert CSV to JSON and save as `oui.json` and build "
+            f"the binary lookup index `oui.idx`"
+            ),
+        )
+    return parser
+
+
+def add_compile_arguments(parser):
+    """Add command line arguments for compiling local sources"""
+    compile_group = parser.add_argument_group(
+        title='compile local vendor databases',
+        )
+    compile_group.add_argument(
+        '--compile',
+        nargs='*',
+        type=parse_source_spec,
+        metavar='SOURCE',
+        help=(
+            f"merge local vendor files into the lookup index, highest "
+            f"priority first. SOURCE is `[NAME=]FORMAT:FILE` with FORMAT "
+            f"one of {', '.join(_source_formats)}, or `ieee` for the "
+            f"downloaded IEEE registries. Where sources assign the same "
+            f"prefix the first one wins, and `--registry` shows its NAME. "
+            f"The sources are saved and also used by `--download`. Without "
+            f"SOURCE, compile the saved sources again. Only rebuilds when a "
+            f"file changed"
+            ),
+        )
+    return parser
+
+
+def add_snapshot_arguments(parser):
+    """Add command line arguments for the dated snapshots of the data"""
+    snapshot_group = parser.add_argument_group(
+        title='OUI data snapshots',
+        )
+    snapshot_group.add_argument(
+        '--as-of',
+        type=normalize_snapshot_date,
+        metavar='DATE',
+        help=(
+            f"look up in the OUI data that was current at DATE, "
+            f"`YYYY-MM-DD` or `YYYY-MM-DDTHH:MM`. A snapshot is saved each "
+            f"time `--download` or `--compile` changes the data"
+            ),
+        )
+    snapshot_group.add_argument(
+        '--snapshots',
+        default=False,
+        action='store_true',
+        help="list the saved snapshots of the OUI data and exit",
+        )
+    snapshot_group.add_argument(
+        '--snapshot-diff',
+        nargs=2,
+        type=normalize_snapshot_date,
+        metavar=('OLD', 'NEW'),
+        help=(
+            f"display the assignments added, removed and changed between "
+            f"the snapshots current at dates OLD and NEW and exit"
+            ),
+        )
+    return parser
+
+
+def add_daemon_arguments(parser):
+    """Add command line arguments for the lookup daemon options"""
+    daemon_group = parser.add_argument_group(
+        title='lookup daemon',
+        )
+    daemon_group.add_argument(
+        '--serve',
+        nargs='?',
+        const=_default_daemon_address,
+        metavar='ADDRESS',
+        help=(
+            f"keep the OUI data loaded and answer lookups on a socket until "
+            f"interrupted. ADDRESS is a Unix socket path or `host:port` for "
+            f"TCP. Default: `{_default_daemon_address}`"
+            ),
+        )
+    daemon_group.add_argument(
+        '--connect',
+        nargs='?',
+        const=_default_daemon_address,
+        metavar='ADDRESS',
+        help=(
+            f"send lookups to a running `--serve` daemon. Falls back to "
+            f"looking up in this process if the daemon is not running"
             ),
         )
-    return download_parser
+    return parser
 
 
-def file_parser_arguments():
-    """Create command line argument for file input option"""
-    file_parser = argparse.ArgumentParser(add_help=False)
-    file_parser.add_argument(
+def add_file_arguments(parser):
+    """Add command line argument for file input option"""
+    parser.add_argument(
         '-f',
         '--file',
         type=pathlib.Path,
@@ -101,34 +231,64 @@ def file_parser_arguments():
         dest='files',
         help="use a file with one MAC address per line.",
         )
-    file_parser.add_argument(
+    parser.add_argument(
+        '--follow',
+        '-F',
+        default=False,
+        action='store_true',
+        help=(
+            f"with `--file`, keep reading lines as they are appended, like "
+            f"`tail -F`. Rotated and truncated files are reopened. Press "
+            f"Ctrl-C to stop"
+            ),
+        )
+    parser.add_argument(
         '--pipe',
-        action='store_const',
-        const=None if sys.stdin.isatty() else sys.stdin,
-        default=None if sys.stdin.isatty() else sys.stdin,
-        help=argparse.SUPPRESS, # Hidden
+        action='store_true',
+        help=argparse.SUPPRESS, # Hidden. Stdin is used whenever piped.
+        )
+    return parser
+
+
+def add_output_arguments(parser):
+    """Add command line arguments for the output format and rejects"""
+    parser.add_argument(
+        '--format',
+        choices=_output_formats,
+        default='text',
+        dest='fmt',
+        help=(
+            f"output format. `jsonl`, `csv` and `tsv` write one record per "
+            f"MAC with the fields {', '.join(_result_fields)}. "
+            f"Default: text"
+            ),
+        )
+    parser.add_argument(
+        '--rejects',
+        type=pathlib.Path,
+        metavar='FILE',
+        help=(
+            f"write inputs that are not a valid MAC/OUI to FILE, one per "
+            f"line, instead of warning about them on stderr"
+            ),
         )
-    return file_parser
+    return parser
 
 
 def parse_arguments():
     """Create command line arguments and auto generated help"""
-    compl_parser = completion_parse_arguments()
-    compl_args, ukwn_args = compl_parser.parse_known_args()
-    completion = compl_args.completion
-    dl_parser = download_parser_arguments()
-    dl_args, dl_ukwn_args = dl_parser.parse_known_args()
-    download = dl_args.download
-    file_parser = file_parser_arguments()
-    file_args, file_ukwn_args = file_parser.parse_known_args()
-    files = file_args.files
-    pipe = file_args.pipe
     parser = argparse.ArgumentParser(
         prog=__script__,
         description=__doc__,
-        parents=[file_parser, dl_parser, compl_parser],
         epilog = 'Have a great day!',
         )
+    add_file_arguments(parser)
+    add_output_arguments(parser)
+    add_download_arguments(parser)
+    add_compile_arguments(parser)
+    add_snapshot_arguments(parser)
+    add_daemon_arguments(parser)
+    add_completion_arguments(parser)
     parser.add_argument(
         '--version',
         '-v',
@@ -143,10 +303,148 @@ def parse_arguments():
         action='store_true',
         help=f"suppress warning messages when MAC is not found to be valid",
         )
-    mac_optional = any([completion, download, files, pipe, not ukwn_args])
+    parser.add_argument(
+        '--registry',
+        '-r',
+        default=False,
+        action='store_true',
+        help=(
+            f"also show the matching IEEE registry and prefix length, "
+            f"e.g. `MA-S/36`"
+            ),
+        )
+    parser.add_argument(
+        '--skip',
+        choices=_skip_digits,
+        action='append',
+        default=[],
+        help=(
+            f"drop multicast or locally administered unicast MACs, which "
+            f"include randomized ones, before they are looked up. May be "
+            f"given more than once"
+            ),
+        )
+    parser.add_argument(
+        '--extract',
+        '-x',
+        default=False,
+        action='store_true',
+        help=(
+            f"find the MACs anywhere in the input text, e.g. `ip neigh`, "
+            f"`show mac address-table` or syslog lines, instead of expecting "
+            f"one MAC per line. Finds colon, dash and Cisco dotted forms"
+            ),
+        )
+    parser.add_argument(
+        '--annotate',
+        default=False,
+        action='store_true',
+        help=(
+            f"like `--extract`, but print the input text with the vendor in "
+            f"brackets after each MAC"
+            ),
+        )
+    parser.add_argument(
+        '--aggregate',
+        choices=_aggregate_modes,
+        help=(
+            f"instead of a line per MAC, display only the number of MACs per "
+            f"vendor, per assignment or both, most frequent first"
+            ),
+        )
+    parser.add_argument(
+        '--top',
+        type=int,
+        metavar='N',
+        help="with `--aggregate`, display only the N most frequent",
+        )
+    parser.add_argument(
+        '--distinct',
+        default=False,
+        action='store_true',
+        help=(
+            f"with `--aggregate`, also estimate the number of distinct MACs "
+            f"(HyperLogLog, about 3%% error per vendor or assignment)"
+            ),
+        )
+    parser.add_argument(
+        '--vendor',
+        action='append',
+        metavar='PATTERN',
+        help=(
+            f"display the assignments of every vendor whose name holds "
+            f"PATTERN, ignoring case, spaces and punctuation. Anchor it with "
+            f"a leading `^` or a trailing `$`. May be given more than once"
+            ),
+        )
+    parser.add_argument(
+        '--vendor-output',
+        choices=_vendor_outputs,
+        default='table',
+        help=(
+            f"with `--vendor`, display a table, only the assignments, e.g. "
+            f"`70B3D5F12`, or only the MAC prefix filters, e.g. "
+            f"`70:B3:D5:F1:20:00/36`. Default: table"
+            ),
+        )
+    parser.add_argument(
+        '--cache-size',
+        type=int,
+        default=_cache_size,
+        metavar='N',
+        help=(
+            f"keep the report lines of the N most recently seen inputs, so "
+            f"repeated MACs skip parsing and lookup. 0 disables the cache. "
+            f"Default: {_cache_size}"
+            ),
+        )
+    parser.add_argument(
+        '--cache-stats',
+        default=False,
+        action='store_true',
+        help="print the cache hit, miss and eviction counts to stderr",
+        )
+    parser.add_argument(
+        '--stats',
+        default=False,
+        action='store_true',
+        help=(
+            f"print the wall and CPU time of each stage, e.g. load, read, "
+            f"lookup and write, and the item, byte and cache counts to stderr"
+            ),
+        )
+    parser.add_argument(
+        '--profile',
+        type=pathlib.Path,
+        metavar='FILE',
+        help=(
+            f"run under cProfile and save the stats to FILE, to read with "
+            f"`python -m pstats FILE`"
+            ),
+        )
+    parser.add_argument(
+        '--jobs',
+        '-j',
+        type=int,
+        default=1,
+        metavar='N',
+        help=(
+            f"look up `--file` inputs with N worker processes. Each file is "
+            f"split into newline aligned chunks. Default: 1"
+            ),
+        )
+    parser.add_argument(
+        '--unordered',
+        default=False,
+        action='store_true',
+        help=(
+            f"with `--jobs`, print each chunk as soon as it is done instead "
+            f"of in input order"
+            ),
+        )
     parser.add_argument(
         'macs',
-        nargs=('*' if mac_optional else '+'),
+        nargs='*',
         metavar='MAC',
         action='extend',
         default=[],
@@ -162,8 +460,30 @@ def parse_arguments():
     return parser
 
 
+def parse_command_line(parser, argv=None):
+    """Parse the command line. Sets `pipe` to stdin when it is piped.
+    MACs are required unless options that do not need them are given.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    args = parser.parse_args(argv)
+    args.pipe = None if sys.stdin.isatty() else sys.stdin
+    mac_optional = any([
+        args.completion, args.download, args.files, args.pipe, args.serve,
+        args.vendor, args.compile is not None, args.snapshots,
+        args.snapshot_diff, not argv,
+        ])
+    if not mac_optional and not args.macs:
+        parser.error('the following arguments are required: MAC')
+    if args.follow and not args.files:
+        parser.error('argument --follow/-F: requires --file')
+    if args.follow and args.aggregate:
+        parser.error('argument --follow/-F: not allowed with --aggregate')
+    return args
+
+
 def print_completion(shell):
     """Read a completion file and print the output"""
+    import importlib.resources
     resource = f"shell-completions/{shell}/{__script__}"
     completions = importlib.resources.files(__module__).joinpath(resource)
     if completions.exists():
@@ -174,54 +494,140 @@ def print_completion(shell):
         return False
 
 
+# Every byte that is not an ASCII hex digit is a separator
+_non_hex_bytes = bytes(
+    sorted(set(range(256)) - set(string.hexdigits.encode('ascii')))
+    )
+
+ParsedMac = collections.namedtuple(
+    'ParsedMac', ['kind', 'value', 'mac', 'oui'],
+    )
+ParsedMac.__doc__ = """A classified MAC/OUI token.
+kind is 'mac' or 'oui', value is the 48-bit int (an OUI is zero padded),
+mac is the canonical `AA:BB:CC:DD:EE:FF` form and oui is `AABBCC`.
+"""
+
+
+def _hex_digits(mac):
+    """Takes a str. Returns only its ASCII hex digits as bytes."""
+    return mac.encode('ascii', errors='ignore').translate(None, _non_hex_bytes)
+
+
+def parse_mac(mac):
+    """Takes a MAC/OUI str with any separators. Classifies it in one pass.
+    Returns a ParsedMac or None if it is neither a MAC nor an OUI.
+    """
+    try:
+        xmac = _hex_digits(mac)
+    except AttributeError:
+        # Not a str, e.g. None or NaN from a data frame column
+        return None
+    if len(xmac) == 12:
+        kind, value = 'mac', int(xmac, base=16)
+    elif len(xmac) == 6:
+        kind, value = 'oui', int(xmac, base=16) << 24
+    else:
+        return None
+    raw = value.to_bytes(6, 'big')
+    return ParsedMac(kind, value, raw.hex(':').upper(), raw[:3].hex().upper())
+
+
+def parse_macs(macs):
+    """Takes an iterable of MAC/OUI str. Returns a list of ParsedMac or
+    None for each item.
+    """
+    return list(map(parse_mac, macs))
+
+
+# Well-known group addresses as (first, last, address class) ranges
+_multicast_ranges = (
+    (0xFFFFFFFFFFFF, 0xFFFFFFFFFFFF, 'broadcast'),
+    (0x01005E000000, 0x01005E7FFFFF, 'ipv4-multicast'),
+    (0x333300000000, 0x3333FFFFFFFF, 'ipv6-multicast'),
+    (0x0180C2000000, 0x0180C2000000, 'stp'),
+    (0x0180C200000E, 0x0180C200000E, 'lldp'),
+    )
+_address_classes = (
+    'universal', 'local', 'random', 'multicast',
+    *(name for first, last, name in _multicast_ranges),
+    )
+# Unicast classes, the ones looked up
+_lookup_classes = ('universal', 'local')
+# The second hex digit of the MACs each --skip group drops. It holds the
+# I/G (multicast) and U/L (local) bits of the first octet.
+_skip_digits = {
+    'multicast': '13579BDF',
+    'local': '26AE',
+    }
+
+
+def classify_mac(value):
+    """Takes a 48-bit MAC int. Returns its address class from the bits
+    alone: `universal` for IEEE assigned unicast, `local` for locally
+    administered unicast, `broadcast`, a well-known multicast range such as
+    `ipv4-multicast`, `ipv6-multicast`, `stp` or `lldp`, or else
+    `multicast`. Lookups report local unicast without a matching
+    assignment as `random`, as it is likely randomized.
+    """
+    first = value >> 40
+    if first & 1:
+        for low, high, name in _multicast_ranges:
+            if low <= value <= high:
+                return name
+        return 'multicast'
+    elif first & 2:
+        return 'local'
+    return 'universal'
+
+
+def skip_macs(macs, skip):
+    """Takes MAC/OUI str and `--skip` groups. Returns the MACs without those
+    in the groups, judged by the first two characters alone, before any
+    parsing. Tokens that do not start with two hex digits are kept.
+    """
+    digits = set()
+    for group in skip:
+        digits.update(_skip_digits[group], _skip_digits[group].lower())
+    hexdigits = string.hexdigits
+    return [
+        mac for mac in macs
+        if not (mac[1:2] in digits and mac[:1] in hexdigits)
+        ]
+
+
 def remove_separators(mac):
     """Takes a hex MAC str.
     Returns string with removed separating and white space characters.
     """
-    xmac = re.sub(rf"[^{string.hexdigits}]", r'', mac)
+    xmac = _hex_digits(mac).decode('ascii')
     return xmac
 
 
+def _pairs(xmac, sep):
+    """Takes a hex str. Returns it with sep between every two digits."""
+    return sep.join([xmac[i:i + 2] for i in range(0, len(xmac), 2)])
+
+
 def std_mac_format(mac, sep=':'):
     """Takes a hex MAC str. Returns string with separators."""
-    strmac = f"{sep}".join(
-        re.findall(r'.{1,2}', rf"{remove_separators(mac):0>12}")
-        )
+    strmac = _pairs(f"{remove_separators(mac):0>12}", sep)
     return strmac
 
 
 def std_oui_format(oui, sep=':'):
     """Takes a hex OUI str. Returns string with separators."""
-    stroui = f"{sep}".join(
-        re.findall(r'.{1,2}', rf"{remove_separators(oui):0>6}")
-        )
+    stroui = _pairs(f"{remove_separators(oui):0>6}", sep)
     return stroui
 
 
 def is_mac(mac):
     """Takes a hex MAC str. Validates it is a MAC."""
-    xmac = remove_separators(mac)
-    if not all([(char in string.hexdigits) for char in xmac]):
-        return False
-    if len(xmac) != 12:
-        return False
-    intmac = int(xmac, base=16)
-    if intmac < 0 or intmac > 0xffffffffffff:
-        return False
-    return True
+    return len(_hex_digits(mac)) == 12
 
 
 def is_oui(oui):
     """Takes a hex OUI str. Validates it is on OUI"""
-    xoui = remove_separators(oui)
-    if not all([char in string.hexdigits for char in xoui]):
-        return False
-    if len(xoui) != 6:
-        return False
-    intoui = int(xoui, base=16)
-    if intoui < 0 or intoui > 0xffffff:
-        return False
-    return True
+    return len(_hex_digits(oui)) == 6
 
 
 def get_oui_from_mac(mac):
@@ -244,56 +650,161 @@ def find_oui_org(oui, oui_dict):
     return 'unknown'
 
 
-def find_mac_org(mac):
-    """Takes a hex MAC str. Returns organization name if found."""
-    oui = get_oui_from_mac(mac)
-    mac_org = find_oui_org(oui)
+def find_mac_prefix(mac, oui_dict, max_bits=48):
+    """Takes a hex MAC str and an index or dict of assignments.
+    Returns the longest matching assignment, registry and organization.
+    Only assignments up to max_bits long are considered.
+    Registry is None when it is not known, e.g. from a JSON dict.
+    """
+    intmac = int(remove_separators(mac), base=16)
+    return find_int_prefix(intmac, oui_dict, max_bits)
+
+
+def find_int_prefix(intmac, oui_dict, max_bits=48):
+    """Takes a 48-bit MAC int and an index or dict of assignments.
+    Returns the same as `find_mac_prefix`.
+    """
+    xmac = f"{intmac:012X}"
+    if isinstance(oui_dict, OuiIndex):
+        match = oui_dict.find_prefix(intmac, max_bits)
+        if match:
+            vid, registry, bits = match
+            return xmac[:bits // 4], registry, oui_dict.vendor(vid)
+    else:
+        for digits in _prefix_digits:
+            if digits * 4 > max_bits:
+                continue
+            if (org := oui_dict.get(xmac[:digits])):
+                return xmac[:digits], None, org
+    return xmac[:6], None, 'unknown'
+
+
+def find_mac_org(mac, oui_dict=None):
+    """Takes a hex MAC str. Returns organization name if found.
+    Uses the default OuiDatabase unless an index or dict is supplied.
+    """
+    if oui_dict is None:
+        return default_database().lookup(mac).vendor
+    assignment, registry, mac_org = find_mac_prefix(mac, oui_dict)
     return mac_org
 
 
+def fetch_if_modified(url, dest, validators=None):
+    """Download file at URL to dest unless it is unchanged since the
+    `etag` / `last_modified` in validators. Streams to a temp file beside
+    dest and renames it into place, so dest is never partially written.
+    Returns a status of 'modified', 'not modified' or None on error, and
+    the validators for the next request.
+    """
+    import shutil
+    import urllib.error
+    import urllib.request
+    validators = validators or {}
+    headers = {}
+    if validators.get('etag'):
+        headers['If-None-Match'] = validators['etag']
+    if validators.get('last_modified'):
+        headers['If-Modified-Since'] = validators['last_modified']
+    request = urllib.request.Request(url, headers=headers)
+    tmp = dest.with_name(f".{dest.name}.{os.getpid()}.part")
+    try:
+        with urllib.request.urlopen(request, None, 5) as resp: # 5s timeout
+            with tmp.open('wb') as f:
+                shutil.copyfileobj(resp, f, _read_chunk_size)
+            new_validators = {
+                'etag': resp.headers.get('ETag'),
+                'last_modified': resp.headers.get('Last-Modified'),
+                }
+    except urllib.error.HTTPError as err:
+        tmp.unlink(missing_ok=True)
+        if err.code == 304:
+            return 'not modified', validators
+        return None, validators
+    except (OSError, ValueError):
+        tmp.unlink(missing_ok=True)
+        return None, validators
+    if not tmp.stat().st_size:
+        tmp.unlink()
+        return None, validators
+    os.replace(tmp, dest)
+    return 'modified', new_validators
+
+
 def download_file(url, dest):
     """Download file at URL to the specified destination"""
-    print(f"Downloading `{url}` to: `{dest}`")
-    try:
-        req = urllib.request.urlopen(url, None, 5) # 5s timeout
-        dat = req.read()
-    except:
-        print(f"Error while downloading `{url}`.")
-        return False
-    print('Download complete.')
-    bytesw = dest.write_bytes(dat)
-    if not bytesw:
-        print(f"No data received.")
-        print('Bye.')
+    print(f"Downloading `{url}` to: `{dest}`", file=sys.stderr)
+    status, validators = fetch_if_modified(url, dest)
+    if not status:
+        print(f"Error while downloading `{url}`.", file=sys.stderr)
         return False
-    print(f"Bytes downloaded: {bytesw:,}")
+    print('Download complete.', file=sys.stderr)
+    print(f"Bytes downloaded: {dest.stat().st_size:,}", file=sys.stderr)
     return True
 
 
-def download_ieee_oui_csv():
-    """Download the IEEE OUI file to user config dir"""
-    if not _user_config_dir.exists():
-        _user_config_dir.mkdir(parents=True, exist_ok=True)
-    if _user_csv_file.exists():
+def download_ieee_registries(registries=None):
+    """Download the IEEE registry files that changed since the last
+    download, using HTTP validators. Defaults to the user registry files.
+    Returns a dict of registry: status, or None if nothing could be done.
+    """
+    import datetime
+    registries = registries or _ieee_registries
+    make_config_dir()
+    state = read_json_file(_user_download_file)
+    ma_l_file, ma_l_url, ma_l_bits = registries['MA-L']
+    # Without validators a request would always transfer the whole file
+    if ma_l_file.exists() and not state.get(ma_l_url):
         from_time_stamp = datetime.datetime.fromtimestamp
-        mtime = from_time_stamp(_user_csv_file.stat().st_mtime)
+        mtime = from_time_stamp(ma_l_file.stat().st_mtime)
         now = datetime.datetime.now()
         one_day = datetime.timedelta(days=1)
         if (now - mtime) < one_day:
             warning = 'RA assignment downloads are limited to one per day.'
-            print(f"[ERROR] Please try again later. Per IEEE: {warning}")
-            print(f"  Last download at: {mtime.replace(microsecond=0)}")
+            print(
+                f"[ERROR] Please try again later. Per IEEE: {warning}",
+                file=sys.stderr,
+                )
+            print(
+                f"  Last download at: {mtime.replace(microsecond=0)}",
+                file=sys.stderr,
+                )
             remain = one_day - (now - mtime)
             remain -= datetime.timedelta(microseconds=remain.microseconds)
-            print(f"  Next download in: {remain}")
-            return False
-    if not download_file(_ieee_csv_url, _user_csv_file):
-        return False
-    return True
+            print(f"  Next download in: {remain}", file=sys.stderr)
+            return None
+    statuses = {}
+    for registry, (csv_file, url, bits) in registries.items():
+        validators = state.get(url) if csv_file.exists() else None
+        print(f"Checking `{url}`", file=sys.stderr)
+        status, state[url] = fetch_if_modified(url, csv_file, validators)
+        statuses[registry] = status or 'failed'
+        if status == 'modified':
+            print(
+                f"  Downloaded {csv_file.stat().st_size:,} bytes",
+                file=sys.stderr,
+                )
+        elif status == 'not modified':
+            print('  Not modified since the last download.', file=sys.stderr)
+        elif registry == 'MA-L':
+            print(f"Error while downloading `{url}`.", file=sys.stderr)
+            return None
+        else:
+            print(
+                f"[WARNING]: Keeping previous {registry} data, if any.",
+                file=sys.stderr,
+                )
+    write_json_file(state, _user_download_file)
+    return statuses
+
+
+def download_ieee_oui_csv():
+    """Download the IEEE OUI files of all registries to user config dir"""
+    return download_ieee_registries() is not None
 
 
 def read_csv_to_list_of_dicts(file, fieldnames=None):
     """Reads the CSV file and returns the data in a list of dicts"""
+    import csv
     if isinstance(file, str):
         file = pathlib.Path(file)
     with file.open(encoding='utf-8') as f:
@@ -304,31 +815,201 @@ def read_csv_to_list_of_dicts(file, fieldnames=None):
     return csv_data
 
 
+def iter_csv_assignments(csv_file):
+    """Takes an IEEE registry CSV file. Yields (assignment, organization)
+    pairs row by row. Organization names are interned, so vendors with many
+    assignments share one string.
+    """
+    import csv
+    with pathlib.Path(csv_file).open(encoding='utf-8', newline='') as f:
+        rows = csv.reader(f)
+        header = next(rows, [])
+        if not {'Assignment', 'Organization Name'} <= set(header):
+            return
+        oui_col = header.index('Assignment')
+        org_col = header.index('Organization Name')
+        min_len = max(oui_col, org_col) + 1
+        intern = sys.intern
+        for row in rows:
+            if len(row) >= min_len:
+                yield row[oui_col], intern(row[org_col])
+
+
 def convert_csv_to_oui_dict(csv_file):
     """Convert an OUI CSV to a dict of oui: org key value pairs"""
-    data = read_csv_to_list_of_dicts(csv_file)
-    csv_header = (
-        'Registry','Assignment','Organization Name','Organization Address',
-        )
+    return convert_source_to_oui_dict(csv_file, 'ieee')
+
+
+def convert_registry_csv_files(registries=None):
+    """Convert the IEEE registry CSV files that exist to a dict of
+    registry: oui_dict pairs. Defaults to the user registry files.
+    """
+    if registries is None:
+        registries = {
+            registry: csv_file
+            for registry, (csv_file, url, bits) in _ieee_registries.items()
+            }
+    oui_dicts = {}
+    for registry, csv_file in registries.items():
+        if pathlib.Path(csv_file).exists():
+            oui_dicts[registry] = convert_csv_to_oui_dict(csv_file)
+    return oui_dicts
+
+
+def parse_source_prefix(prefix):
+    """Takes an assignment as written in a source file, e.g. `001BC5`,
+    `00:1B:C5` or `00:1B:C5:00:00:00/36`. Returns the hex assignment str
+    of its prefix length, or None if it is not one the index supports.
+    """
+    prefix, sep, bits = prefix.partition('/')
+    if not prefix or prefix.strip(string.hexdigits + ':-.'):
+        return None
+    xprefix = remove_separators(prefix).upper()
+    if sep:
+        if not bits.isdigit() or int(bits) % 4:
+            return None
+        xprefix = xprefix[:int(bits) // 4]
+    if len(xprefix) not in _prefix_digits:
+        return None
+    return xprefix
+
+
+def iter_source_lines(file):
+    """Takes a text source file. Yields its lines without the line end,
+    skipping blank lines and `#` comments.
+    """
+    with pathlib.Path(file).open(encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line
+
+
+def iter_manuf_assignments(manuf_file):
+    """Takes a Wireshark `manuf` file. Yields (assignment, organization)
+    pairs. The long name is used where there is one, else the short name.
+    """
+    intern = sys.intern
+    for line in iter_source_lines(manuf_file):
+        fields = line.split('\t')
+        if len(fields) < 2 or not (oui := parse_source_prefix(fields[0])):
+            continue
+        # Older files have the long name as a trailing `# comment`
+        org = fields[2].lstrip('# ').strip() if len(fields) > 2 else ''
+        yield oui, intern(org or fields[1].strip())
+
+
+def iter_prefix_assignments(prefix_file):
+    """Takes a file of `PREFIX VENDOR NAME` lines, like nmap
+    `nmap-mac-prefixes` or an overrides file. PREFIX may have separators
+    and a `/bits` prefix length. Yields (assignment, organization) pairs.
+    """
+    intern = sys.intern
+    for line in iter_source_lines(prefix_file):
+        fields = line.split(None, 1)
+        if len(fields) < 2 or not (oui := parse_source_prefix(fields[0])):
+            continue
+        yield oui, intern(fields[1].strip())
+
+
+# Format name: function yielding the (assignment, organization) pairs
+_source_formats = {
+    'ieee': iter_csv_assignments,
+    'manuf': iter_manuf_assignments,
+    'nmap': iter_prefix_assignments,
+    'overrides': iter_prefix_assignments,
+    }
+
+
+def convert_source_to_oui_dict(file, fmt='ieee'):
+    """Convert a source file of a `_source_formats` format to a dict of
+    oui: org key value pairs
+    """
     oui_dict = {}
-    for row in data:
-        oui = row['Assignment']
-        org = row['Organization Name']
-        if oui not in oui_dict:
-            oui_dict.update({oui: org})
-        elif isinstance(oui_dict.get(oui), str):
-            value = [oui_dict[oui], org]
-            oui_dict.update({oui: value})
-        elif isinstance(oui_dict.get(oui), list):
-            value = oui_dict[oui] + [org]
-            oui_dict.update({oui: value})
+    for oui, org in _source_formats[fmt](file):
+        value = oui_dict.get(oui)
+        if value is None:
+            oui_dict[oui] = org
+        elif isinstance(value, str):
+            oui_dict[oui] = [value, org]
         else:
-            oui_dict.update({oui: org})
+            value.append(org)
     return oui_dict
 
 
+def parse_source_spec(spec):
+    """Takes a `--compile` SOURCE, `[NAME=]FORMAT:FILE` or `ieee`.
+    Returns a tuple of name, format and pathlib file, where file is None
+    for `ieee`, the downloaded IEEE registries. The name defaults to the
+    file name. Raises argparse.ArgumentTypeError if it is not valid.
+    """
+    if spec == 'ieee':
+        return 'ieee', 'ieee', None
+    name, sep, rest = spec.partition('=')
+    if not sep or ':' in name:
+        name, rest = '', spec
+    fmt, sep, file = rest.partition(':')
+    if not sep or fmt not in _source_formats or not file:
+        raise argparse.ArgumentTypeError(
+            f"invalid source `{spec}`, expected `[NAME=]FORMAT:FILE` with "
+            f"FORMAT one of {', '.join(_source_formats)}, or `ieee`"
+            )
+    file = pathlib.Path(file).expanduser().resolve()
+    return name or file.name, fmt, file
+
+
+def expand_sources(sources):
+    """Takes a list of (name, format, file) tuples from `parse_source_spec`.
+    Returns it with `ieee` replaced by the IEEE registry files that exist.
+    """
+    expanded = []
+    for name, fmt, file in sources:
+        if file is None:
+            expanded += [
+                (registry, 'ieee', csv_file)
+                for registry, (csv_file, url, bits) in _ieee_registries.items()
+                if csv_file.exists()
+                ]
+        else:
+            expanded.append((name, fmt, pathlib.Path(file)))
+    return expanded
+
+
+def read_user_sources():
+    """Return the saved `--compile` sources, or just the IEEE registries"""
+    saved = read_json_file(_user_sources_file)
+    if not saved:
+        return [('ieee', 'ieee', None)]
+    return [
+        (name, fmt, pathlib.Path(file) if file else None)
+        for name, fmt, file in saved
+        ]
+
+
+def write_user_sources(sources):
+    """Save a list of (name, format, file) tuples as the `--compile`
+    sources. Returns the number of bytes written.
+    """
+    make_config_dir()
+    return write_json_file(
+        [[name, fmt, file and str(file)] for name, fmt, file in sources],
+        _user_sources_file,
+        )
+
+
+def hash_file(file):
+    """Takes a pathlib file obj. Returns the SHA-256 hex digest of it"""
+    import hashlib
+    digest = hashlib.sha256()
+    with pathlib.Path(file).open('rb') as f:
+        while (chunk := f.read(_read_chunk_size)):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
 def read_json_file(file):
     """Takes a pathlib file obj. Returns a default json obj"""
+    import json
     if isinstance(file, str):
         file = pathlib.Path(file)
     if (j := file).exists():
@@ -342,117 +1023,2917 @@ def write_json_file(jsonobj,file):
     """Takes a json obj and a pathlib file. Writes json obj to file.
     Returns the number of bytes written.
     """
+    def writer(f):
+        text = io.TextIOWrapper(f, encoding='utf-8')
+        json.dump(jsonobj, text, indent=1)
+        text.detach()
+        return f.tell()
+    import io
+    import json
     if isinstance(file, str):
         file = pathlib.Path(file)
-    numbytes = file.write_text(json.dumps(jsonobj, indent=1))
+    numbytes = write_file_atomic(file, writer)
     return numbytes
 
 
-def convert_user_csv_file_to_user_json_file():
-    """Converts a CSV list of dicts and then saves to JSON file"""
-    print(f"Converting '{_user_csv_file}' to '{_user_json_file}'...")
-    ouis_dict = convert_csv_to_oui_dict(_user_csv_file)
-    numbytes = write_json_file(ouis_dict, _user_json_file)
-    if not numbytes:
-        print(f"There was an error saving file '{_user_json_file}'")
-        return False
-    print(f"Success. Wrote {numbytes} bytes to '{_user_json_file}'")
-    return True
+def write_file_atomic(file, data):
+    """Takes a pathlib file and bytes, or a function that writes to an open
+    binary file and returns the number of bytes written. Writes a temp file
+    beside file and renames it into place, so readers see the old or the
+    new file, never a partial one. Returns the number of bytes written.
+    """
+    tmp = file.with_name(f".{file.name}.{os.getpid()}.tmp")
+    try:
+        with tmp.open('wb') as f:
+            numbytes = data(f) if callable(data) else f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, file)
+    except Exception:
+        tmp.unlink(missing_ok=True)
+        raise
+    return numbytes
 
 
-def check_user_data_files():
-    """Verify user files exist. Convert CSV to JSON is possible"""
-    if _user_csv_file.exists() and not _user_json_file.exists():
-        print(f"Can not find file {_user_json_file}")
-        print(f"Found source file {_user_csv_file}.")
-        if not convert_user_csv_file_to_user_json_file():
-            return False
-    if not _user_json_file.exists():
-        print(
-            f"[ERROR]: Could not read OUI data.`{_user_json_file}`.\n"
-            f"Use the `--download` option and try again."
-            )
-        return False
-    return True
+# Binary index layout (all integers little-endian):
+#   header:  magic, format version, number of sections
+#   table:   one entry per section: tag, array typecode, offset, item count
+#   data:    each section is a flat array aligned to 8 bytes
+# Sections:
+#   K24 K28 K36  sorted assignment prefixes of 24, 28 and 36 bits
+#   V24 V28 V36  vendor string id for each key as uint32
+#   R24 R28 R36  registry id for each key as uint8
+#   REGS  registry names joined by NUL, indexed by registry id
+#   SOFF  byte offsets into STRS for each vendor string (count + 1)
+#   STRS  deduplicated UTF-8 vendor strings
+#   NOFF NSTR  normalized vendor names, each wrapped in NUL, by vendor id
+#   AOFF ALST  assignments of each vendor as positions in K36 K28 K24
+#   GKEY GOFF GVID  sorted n-grams of the names and byte offsets of their
+#                   vendor ids in GVID, each list as varint deltas
+#   SRCS  optional JSON list of the sources of `compile_sources`
+# An assignment held by several organizations stores its names joined by NUL.
+_index_magic = b'OUIX'
+_index_version = 4
+_index_header = struct.Struct('<4sHH')
+_index_section = struct.Struct('<4s1s3xQQ')
+_prefix_bits = (36, 28, 24)
+_prefix_digits = tuple(bits // 4 for bits in _prefix_bits)
+_read_chunk_size = 1 << 16
+_extract_chunk_size = 1 << 20
+_batch_size = 4096
+_job_chunk_size = 1 << 22
+_cache_size = 1 << 16  # Entries of the --cache-size LRU caches
+_follow_interval = 0.005  # Seconds between polls of idle --follow files
+_output_formats = ('text', 'jsonl', 'csv', 'tsv')
+# OuiResult fields written by the jsonl, csv and tsv formats
+_result_fields = (
+    'query', 'mac', 'assignment', 'registry', 'bits', 'addr_class', 'vendor',
+    )
+# Summary fields of --aggregate. `by` is vendor, oui or total
+_aggregate_fields = (
+    'by', 'count', 'distinct', 'assignment', 'registry', 'bits', 'vendor',
+    )
+_aggregate_modes = ('vendor', 'oui', 'both')
+_hll_precision = 10  # 1 KiB and about 3% error per counted key
+_hll_total_precision = 14
+_hll_exact_limit = 16  # Distinct ints counted exactly before sketching
+_vendor_gram = 3  # Length of the n-grams in the vendor search index
+_vendor_scan_limit = 512  # Candidates checked before scanning all names
+_vendor_fields = ('assignment', 'prefix', 'registry', 'bits', 'vendor')
+_vendor_outputs = {  # Fields of each --vendor-output style
+    'table': _vendor_fields,
+    'assignments': ('assignment',),
+    'prefixes': ('prefix',),
+    }
+
+
+def normalize_vendor(name):
+    """Takes an org name. Returns it casefolded without spaces or
+    punctuation, so `Hewlett-Packard` and `hewlett packard` are the same.
+    """
+    return ''.join(filter(str.isalnum, name.casefold()))
+
+
+def vendor_grams(name):
+    """Takes a normalized org name. Returns the set of its n-gram ints"""
+    data = name.encode('utf-8')
+    return {
+        int.from_bytes(data[i:i + _vendor_gram], 'big')
+        for i in range(len(data) - _vendor_gram + 1)
+        }
+
+
+def delimit_vendor(org):
+    """Takes an org name or list of names. Returns them normalized, each
+    between NUL characters, to search with a `vendor_needle`.
+    """
+    names = [org] if isinstance(org, str) else org
+    return ''.join(f"\0{normalize_vendor(name)}\0" for name in names)
+
+
+def vendor_needle(pattern):
+    """Takes a vendor search pattern, found anywhere in an org name,
+    at its start with a leading `^` or at its end with a trailing `$`.
+    Case, spaces and punctuation are ignored. Returns the normalized pattern
+    with a NUL character for each anchor, or '' if nothing is left.
+    """
+    text = normalize_vendor(pattern)
+    if not text:
+        return ''
+    start = '\0' if pattern.startswith('^') else ''
+    end = '\0' if pattern.endswith('$') else ''
+    return f"{start}{text}{end}"
+
+
+def format_prefix(key, bits):
+    """Takes an assignment int and its prefix length in bits.
+    Returns it as a MAC prefix filter, e.g. `70:B3:D5:F1:20:00/36`.
+    """
+    return f"{(key << 48 - bits).to_bytes(6, 'big').hex(':').upper()}/{bits}"
+
+
+def encode_deltas(values):
+    """Takes sorted ints. Returns bytes of the differences between them,
+    starting from 0, as LEB128 varints, most of them one byte.
+    """
+    data = bytearray()
+    last = 0
+    for value in values:
+        delta = value - last
+        last = value
+        while delta > 0x7f:
+            data.append(delta & 0x7f | 0x80)
+            delta >>= 7
+        data.append(delta)
+    return data
+
+
+def decode_deltas(data):
+    """Takes bytes from `encode_deltas`. Returns the list of ints"""
+    values = []
+    value = shift = total = 0
+    for byte in data:
+        value |= (byte & 0x7f) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        total += value
+        values.append(total)
+        value = shift = 0
+    return values
+
+
+def write_index_file(oui_dicts, file, sources=None):
+    """Takes a dict of registry: oui_dict pairs and a pathlib file.
+    Writes a compact binary index to file. Returns the number of bytes written.
+    Besides the assignments sorted per prefix length, the index holds the
+    assignments of each vendor and an n-gram index of the vendor names.
+    sources, a JSON-able list describing the files it was compiled from, is
+    kept as is and read back with `OuiIndex.sources`.
+    """
+    if isinstance(file, str):
+        file = pathlib.Path(file)
+    def writer(f):
+        f.write(_index_header.pack(
+            _index_magic, _index_version, len(sections),
+            ))
+        offset = _index_header.size + _index_section.size * len(sections)
+        offsets = []
+        for tag, arr in sections:
+            offset += -offset % 8
+            offsets.append(offset)
+            f.write(_index_section.pack(
+                tag.ljust(4), arr.typecode.encode(), offset, len(arr),
+                ))
+            offset += len(arr) * arr.itemsize
+        for (tag, arr), offset in zip(sections, offsets):
+            f.write(bytes(offset - f.tell()))
+            arr.tofile(f)
+        return f.tell()
+    registries = list(oui_dicts)
+    vendor_ids = {}
+    vendor_assignments = []
+    layers = {
+        bits: (array.array('Q' if bits > 32 else 'I'),
+               array.array('I'), array.array('B'))
+        for bits in _prefix_bits
+        }
+    for reg_id, registry in enumerate(registries):
+        for oui, org in oui_dicts[registry].items():
+            if (layer := layers.get(len(oui) * 4)) is None:
+                continue
+            if isinstance(org, list):
+                org = '\0'.join(org)
+            vid = vendor_ids.setdefault(org, len(vendor_ids))
+            if vid == len(vendor_assignments):
+                vendor_assignments.append([])
+            keys, vids, regs = layer
+            keys.append(int(oui, base=16))
+            vids.append(vid)
+            regs.append(reg_id)
+            vendor_assignments[vid].append(
+                (keys[-1], len(oui) * 4, len(keys) - 1),
+                )
+    sections = []
+    positions = {}
+    start = 0
+    for bits, (keys, vids, regs) in layers.items():
+        # A stable sort keeps the registry order for equal keys
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        sections += [
+            (f"K{bits}".encode(), array.array(
+                keys.typecode, map(keys.__getitem__, order),
+                )),
+            (f"V{bits}".encode(), array.array(
+                'I', map(vids.__getitem__, order),
+                )),
+            (f"R{bits}".encode(), array.array(
+                'B', map(regs.__getitem__, order),
+                )),
+            ]
+        # Position of each key in the sections of all the layers
+        positions[bits] = array.array('I', bytes(4 * len(keys)))
+        for position, i in enumerate(order, start):
+            positions[bits][i] = position
+        start += len(keys)
+    blob = bytearray()
+    offsets = array.array('I', [0])
+    names_blob = bytearray()
+    names_offsets = array.array('I', [0])
+    assignment_offsets = array.array('I', [0])
+    assignments = array.array('I')
+    postings = {}
+    for vid, org in enumerate(vendor_ids):
+        blob += org.encode('utf-8')
+        offsets.append(len(blob))
+        assignments.extend(
+            positions[bits][i]
+            for key, bits, i in sorted(vendor_assignments[vid])
+            )
+        assignment_offsets.append(len(assignments))
+        names = [normalize_vendor(name) for name in org.split('\0')]
+        names_blob += ''.join(f"\0{name}\0" for name in names).encode()
+        names_offsets.append(len(names_blob))
+        for gram in set().union(*map(vendor_grams, names)):
+            postings.setdefault(gram, []).append(vid)
+    gram_keys = array.array('I', sorted(postings))
+    gram_offsets = array.array('I', [0])
+    gram_vids = bytearray()
+    for gram in gram_keys:
+        gram_vids += encode_deltas(postings[gram])
+        gram_offsets.append(len(gram_vids))
+    sections += [
+        (b'REGS', array.array('B', '\0'.join(registries).encode())),
+        (b'SOFF', offsets),
+        (b'STRS', array.array('B', blob)),
+        (b'NOFF', names_offsets),
+        (b'NSTR', array.array('B', names_blob)),
+        (b'AOFF', assignment_offsets),
+        (b'ALST', assignments),
+        (b'GKEY', gram_keys),
+        (b'GOFF', gram_offsets),
+        (b'GVID', array.array('B', gram_vids)),
+        ]
+    if sources is not None:
+        import json
+        sections.append((b'SRCS', array.array(
+            'B', json.dumps(sources).encode('utf-8'),
+            )))
+    if sys.byteorder != 'little':
+        for tag, arr in sections:
+            arr.byteswap()
+    numbytes = write_file_atomic(file, writer)
+    return numbytes
+
+
+def import_numpy():
+    """Return the numpy module. Raises ImportError with a hint if missing.
+    NumPy is optional and only needed for the array lookups.
+    """
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError(
+            "Array lookups need NumPy. Install it with `pip install numpy`"
+            ) from None
+    return numpy
+
+
+class OuiIndex:
+    """Read-only, memory-mapped view of a binary OUI index file.
+    Supports `get` like the dict returned by `read_json_file`.
+    Nothing is parsed up front; lookups binary search the mapped keys of
+    each prefix length, longest first, so a MAC costs at most three probes.
+    The index may also start at an offset of file, e.g. a member stored
+    uncompressed in a zip, or be given as bytes in data instead of mapped.
+    """
+
+    def __init__(self, file, offset=0, data=None):
+        if isinstance(file, str):
+            file = pathlib.Path(file)
+        self.file = file
+        if data is None:
+            with file.open('rb') as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._mmap = data
+        magic, version, count = _index_header.unpack_from(self._mmap, offset)
+        if magic != _index_magic or version != _index_version:
+            if isinstance(self._mmap, mmap.mmap):
+                self._mmap.close()
+            raise ValueError(f"Not a supported OUI index file: `{file}`")
+        self._sections = {}
+        self._offsets = {}
+        for i in range(count):
+            tag, typecode, start, items = _index_section.unpack_from(
+                self._mmap,
+                offset + _index_header.size + i * _index_section.size,
+                )
+            self._sections[tag.strip()] = self._view(
+                typecode.decode(), offset + start, items,
+                )
+            self._offsets[tag.strip()] = offset + start
+        self._layers = [
+            (
+                bits,
+                self._sections[f"K{bits}".encode()],
+                self._sections[f"V{bits}".encode()],
+                self._sections[f"R{bits}".encode()],
+                )
+            for bits in _prefix_bits
+            ]
+        self._layer_starts = list(itertools.accumulate(
+            [0] + [len(keys) for bits, keys, vids, regs in self._layers[:-1]],
+            ))
+        self._soff = self._sections[b'SOFF']
+        self._strs = self._sections[b'STRS']
+        self._aoff = self._sections[b'AOFF']
+        self._alst = self._sections[b'ALST']
+        self._gkeys = self._sections[b'GKEY']
+        self._goff = self._sections[b'GOFF']
+        self._gvids = self._sections[b'GVID']
+        self._noff = self._sections[b'NOFF']
+        self._nstr = self._offsets[b'NSTR']
+        self.registries = (
+            self._sections[b'REGS'].tobytes().decode().split('\0')
+            )
+        self._vendor_table = None
+        self._oui_layers = None
+
+    def _view(self, typecode, offset, items):
+        """Return a zero-copy array view of a section of the mapped file"""
+        size = array.array(typecode).itemsize
+        view = memoryview(self._mmap)[offset:offset + size * items]
+        if sys.byteorder == 'little':
+            return view.cast(typecode)
+        arr = array.array(typecode, view.tobytes())
+        arr.byteswap()
+        return arr
+
+    def __len__(self):
+        return sum(len(keys) for bits, keys, vids, regs in self._layers)
+
+    def __contains__(self, oui):
+        return self.get(oui) is not None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Release the memory map"""
+        for view in self._sections.values():
+            if isinstance(view, memoryview):
+                view.release()
+        self._sections.clear()
+        self._layers.clear()
+        if isinstance(self._mmap, mmap.mmap):
+            self._mmap.close()
+
+    @property
+    def sources(self):
+        """The list of sources the index was compiled from, or [] if it was
+        not compiled by `compile_sources`
+        """
+        if b'SRCS' not in self._sections:
+            return []
+        import json
+        return json.loads(self._sections[b'SRCS'].tobytes())
+
+    def vendor(self, vid):
+        """Takes a vendor string id. Returns the org name or list of names."""
+        start, end = self._soff[vid], self._soff[vid + 1]
+        org = self._strs[start:end].tobytes().decode('utf-8')
+        if '\0' in org:
+            return org.split('\0')
+        return org
+
+    def assignments(self, vid):
+        """Takes a vendor string id. Returns its assignments in order as
+        tuples of assignment int, prefix length in bits and registry name.
+        """
+        found = []
+        for position in self._alst[self._aoff[vid]:self._aoff[vid + 1]]:
+            n = bisect.bisect_right(self._layer_starts, position) - 1
+            bits, keys, vids, regs = self._layers[n]
+            i = position - self._layer_starts[n]
+            found.append((keys[i], bits, self.registries[regs[i]]))
+        return found
+
+    def _gram_postings(self, gram):
+        """Return the encoded vendor ids of the names holding an n-gram"""
+        i = bisect.bisect_left(self._gkeys, gram)
+        if i < len(self._gkeys) and self._gkeys[i] == gram:
+            return self._gvids[self._goff[i]:self._goff[i + 1]]
+        return self._gvids[:0]
+
+    def _vendor_holds(self, vid, needle):
+        """Return True if the delimited names of a vendor hold needle"""
+        return self._mmap.find(
+            needle, self._nstr + self._noff[vid],
+            self._nstr + self._noff[vid + 1],
+            ) >= 0
+
+    def search_vendors(self, pattern):
+        """Takes a vendor search pattern, see `vendor_needle`.
+        Returns the sorted vendor string ids of the matching vendors.
+        """
+        needle = vendor_needle(pattern)
+        if not needle:
+            return []
+        grams = vendor_grams(needle.strip('\0'))
+        needle = needle.encode('utf-8')
+        # Check only the vendors with the rarest n-gram of the pattern,
+        # unless it is too short or so common that one scan of all the
+        # names is faster
+        # A vendor id takes 1 to 3 bytes, so the fewest bytes are close to
+        # the fewest vendors and more than 3 per limit are too many
+        postings = min(map(self._gram_postings, grams), key=len, default=None)
+        if postings is not None and len(postings) <= _vendor_scan_limit * 3:
+            candidates = decode_deltas(postings)
+            if len(candidates) <= _vendor_scan_limit:
+                return [
+                    vid for vid in candidates
+                    if self._vendor_holds(vid, needle)
+                    ]
+        found = []
+        end = self._nstr + self._noff[-1]
+        pos = self._mmap.find(needle, self._nstr, end)
+        while pos >= 0:
+            vid = bisect.bisect_right(self._noff, pos - self._nstr) - 1
+            found.append(vid)
+            pos = self._mmap.find(
+                needle, self._nstr + self._noff[vid + 1], end,
+                )
+        return found
+
+    def vendor_table(self):
+        """Return the names of every vendor string id as a list, with
+        'unknown' appended so that index -1 gives 'unknown'.
+        """
+        if self._vendor_table is None:
+            self._vendor_table = [
+                self.vendor(vid) for vid in range(len(self._soff) - 1)
+                ] + ['unknown']
+        return self._vendor_table
+
+    def _numpy_view(self, np, tag):
+        """Return a zero-copy NumPy array over a section of the mapped file"""
+        section = self._sections[tag]
+        typecode = getattr(section, 'typecode', None) or section.format
+        dtype = np.dtype(typecode).newbyteorder('<')
+        return np.frombuffer(
+            self._mmap, dtype, len(section), self._offsets[tag],
+            )
+
+    def _numpy_oui_layers(self, np):
+        """Return a uint8 array with an entry per 24-bit OUI, where bit n is
+        set if layer n of `_prefix_bits` has assignments under that OUI.
+        Built once, it takes 16 MiB.
+        """
+        if self._oui_layers is None:
+            oui_layers = np.zeros(1 << 24, dtype=np.uint8)
+            for n, bits in enumerate(_prefix_bits):
+                keys = self._numpy_view(np, f"K{bits}".encode())
+                ouis = (keys >> np.uint64(bits - 24)).astype(np.intp)
+                oui_layers[ouis] |= 1 << n
+            self._oui_layers = oui_layers
+        return self._oui_layers
+
+    def lookup_array(self, macs):
+        """Takes an array-like of 48-bit MAC ints, e.g. a NumPy uint64
+        column. Returns a NumPy int64 array of vendor string ids, -1 where
+        nothing matched. Needs NumPy.
+        Like `OuiDatabase.lookup_int`, values over 48 bits and multicast
+        MACs are not looked up.
+        """
+        np = import_numpy()
+        macs = np.asarray(macs, dtype=np.uint64)
+        shape = macs.shape
+        macs = macs.reshape(-1)
+        vids = np.full(macs.shape, -1, dtype=np.int64)
+        top = macs >> np.uint64(40)
+        lookup = (macs <= 0xffffffffffff) & (top & 1 == 0)
+        ouis = (macs >> np.uint64(24) & np.uint64(0xffffff)).astype(np.intp)
+        layers = np.where(lookup, self._numpy_oui_layers(np)[ouis], 0)
+        # Longest prefix first; each layer only searches the MACs under an
+        # OUI it has assignments for that no longer layer matched
+        for n, bits in enumerate(_prefix_bits):
+            pending = np.flatnonzero(layers & 1 << n)
+            if not len(pending):
+                continue
+            keys = self._numpy_view(np, f"K{bits}".encode())
+            values = (macs[pending] >> np.uint64(48 - bits)).astype(
+                keys.dtype,
+                )
+            i = np.searchsorted(keys, values)
+            np.minimum(i, len(keys) - 1, out=i)
+            hit = keys[i] == values
+            vids[pending[hit]] = self._numpy_view(np, f"V{bits}".encode())[
+                i[hit]
+                ]
+            layers[pending[hit]] = 0
+        return vids.reshape(shape)
+
+    def find(self, intoui, bits=24):
+        """Takes an assignment int of the given prefix length.
+        Returns the vendor string id or None.
+        """
+        for layer_bits, keys, vids, regs in self._layers:
+            if layer_bits != bits:
+                continue
+            i = bisect.bisect_left(keys, intoui)
+            if i < len(keys) and keys[i] == intoui:
+                return vids[i]
+        return None
+
+    def find_prefix(self, intmac, max_bits=48):
+        """Takes a 48-bit MAC int. Returns the longest matching assignment
+        up to max_bits long as a tuple of vendor string id, registry name
+        and prefix length in bits, or None.
+        """
+        for bits, keys, vids, regs in self._layers:
+            if bits > max_bits:
+                continue
+            key = intmac >> (48 - bits)
+            i = bisect.bisect_left(keys, key)
+            if i < len(keys) and keys[i] == key:
+                return vids[i], self.registries[regs[i]], bits
+        return None
+
+    def get(self, oui, default=None):
+        """Takes a hex assignment str of 6, 7 or 9 digits.
+        Returns organization name or default.
+        """
+        xoui = remove_separators(oui)
+        if len(xoui) != len(oui) or len(oui) not in _prefix_digits:
+            return default
+        vid = self.find(int(oui, base=16), len(oui) * 4)
+        if vid is None:
+            return default
+        return self.vendor(vid)
+
+    def to_dicts(self):
+        """Return the index contents as a dict of registry: oui_dict pairs"""
+        oui_dicts = {registry: {} for registry in self.registries}
+        for bits, keys, vids, regs in self._layers:
+            for key, vid, reg_id in zip(keys, vids, regs):
+                oui_dict = oui_dicts[self.registries[reg_id]]
+                oui_dict[f"{key:0{bits // 4}X}"] = self.vendor(vid)
+        return oui_dicts
+
+    def to_dict(self):
+        """Return the index contents as a dict of assignment: org pairs"""
+        oui_dict = {}
+        for registry_dict in self.to_dicts().values():
+            oui_dict.update(registry_dict)
+        return oui_dict
+
+
+def read_index_file(file):
+    """Takes a pathlib file obj. Returns an OuiIndex or None if unusable"""
+    if isinstance(file, str):
+        file = pathlib.Path(file)
+    if not file.exists() or not file.stat().st_size:
+        return None
+    try:
+        return OuiIndex(file)
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def read_bundled_index():
+    """Open the index shipped inside the package. Beside the module it is
+    memory-mapped like the user index. Inside a zip, e.g. the `.pyz`, it is
+    mapped in place when stored uncompressed, else read into memory.
+    Returns an OuiIndex or None if there is none.
+    """
+    module_file = pathlib.Path(__file__)
+    if (file := module_file.with_name(_bundled_index)).is_file():
+        return read_index_file(file)
+    if module_file.is_file():
+        # Not in a zip, importlib.resources would find the same nothing
+        return None
+    import importlib.resources
+    import zipfile
+    try:
+        resource = importlib.resources.files(__module__).joinpath(
+            _bundled_index,
+            )
+        if not resource.is_file():
+            return None
+        archive = resource.root
+        info = archive.getinfo(resource.at)
+        if info.compress_type != zipfile.ZIP_STORED:
+            return OuiIndex(module_file, data=resource.read_bytes())
+        # The member data follows its local header, name and extra field
+        with open(archive.filename, 'rb') as f:
+            f.seek(info.header_offset)
+            header = f.read(30)
+        name_size, extra_size = struct.unpack_from('<HH', header, 26)
+        return OuiIndex(
+            pathlib.Path(archive.filename),
+            info.header_offset + 30 + name_size + extra_size,
+            )
+    except (
+            AttributeError, KeyError, OSError, TypeError, ValueError,
+            struct.error,
+            ):
+        return None
+
+
+def build_bundled_index(file):
+    """Build the index to ship inside the package at release time from the
+    downloaded IEEE registries, never from `--compile` sources.
+    Returns True on success.
+    """
+    oui_dicts = convert_registry_csv_files()
+    if 'MA-L' not in oui_dicts:
+        print(
+            f"[ERROR]: Could not read `{_user_csv_file}`.\n"
+            f"Use the `--download` option and try again.",
+            file=sys.stderr,
+            )
+        return False
+    numbytes = write_index_file(oui_dicts, pathlib.Path(file))
+    print(f"Success. Wrote {numbytes} bytes to '{file}'", file=sys.stderr)
+    return True
+
+
+def is_current_index_file(file):
+    """Takes a pathlib file obj. Validates it is an index of this version"""
+    if isinstance(file, str):
+        file = pathlib.Path(file)
+    if not file.exists():
+        return False
+    with file.open('rb') as f:
+        header = f.read(_index_header.size)
+    if len(header) != _index_header.size:
+        return False
+    magic, version, count = _index_header.unpack(header)
+    return magic == _index_magic and version == _index_version
+
+
+class OuiResult(collections.namedtuple('OuiResult', [
+        'query', 'kind', 'value', 'mac', 'oui', 'assignment', 'vendor',
+        'registry', 'bits', 'addr_class',
+        ])):
+    """The outcome of looking up one MAC/OUI.
+    query is the input as given and kind is 'mac', 'oui' or None if the
+    query is not valid. value is the 48-bit int, mac and oui are the
+    canonical forms and assignment is the longest matching prefix of
+    `bits` bits from `registry`. vendor is 'unknown' when nothing matched.
+    addr_class is what `classify_mac` returns, or `random` for local
+    unicast that matched no assignment. Multicast addresses are not looked
+    up.
+    """
+    __slots__ = ()
+
+    @property
+    def valid(self):
+        """True if the query is a MAC or an OUI"""
+        return self.kind is not None
+
+    @property
+    def multicast(self):
+        """True for group addresses, the I/G bit is set"""
+        return self.valid and bool(self.value >> 40 & 1)
+
+    @property
+    def local(self):
+        """True for locally administered addresses, the U/L bit is set"""
+        return self.valid and bool(self.value >> 40 & 2)
+
+    @property
+    def randomized(self):
+        """True for local unicast addresses without a matching assignment"""
+        return self.addr_class == 'random'
+
+
+class VendorAssignment(collections.namedtuple(
+        'VendorAssignment', _vendor_fields,
+        )):
+    """One assignment of a vendor found by `OuiDatabase.search_vendor`.
+    assignment is the hex prefix of `bits` bits from `registry` and prefix
+    is the same as a MAC prefix filter, e.g. `70:B3:D5:F1:20:00/36`.
+    """
+    __slots__ = ()
+
+
+class OuiDatabase:
+    """OUI lookups backed by the binary index, or `oui.json` if there is no
+    index. The data is loaded once on first use and can be reloaded when
+    the files change. Lookups never raise; unusable data or queries give a
+    vendor of 'unknown'. Safe to share between threads.
+    With a cache_size, results of repeated queries are kept in an LRU
+    LookupCache, available as `cache`, that is cleared on reload.
+    Set `stats` to a RunStats to time loading, parsing and lookups.
+    With bundled, the default without an index_file, the index shipped
+    inside the package is used only when neither data file can be read,
+    so the data of `--download` or `--compile` always comes first.
+    """
+
+    def __init__(self, index_file=None, json_file=None, cache_size=0,
+                 bundled=None):
+        self.bundled = index_file is None if bundled is None else bundled
+        self.index_file = pathlib.Path(index_file or _user_index_file)
+        self.json_file = pathlib.Path(json_file or _user_json_file)
+        self.cache = LookupCache(cache_size) if cache_size else None
+        self.stats = None
+        self._lock = threading.Lock()
+        self._signature = None
+        self._ouis_dict = None
+
+    def _stat_signature(self):
+        """Return what identifies the current version of the data files"""
+        for file in [self.index_file, self.json_file]:
+            try:
+                st = file.stat()
+            except OSError:
+                continue
+            return file, st.st_ino, st.st_size, st.st_mtime_ns
+        return None
+
+    def _load(self, signature):
+        """Read the data files and swap them in"""
+        with self._lock:
+            if self._ouis_dict is not None and signature == self._signature:
+                return
+            if (stats := self.stats) is not None:
+                stats.start()
+            ouis_dict = read_index_file(self.index_file)
+            if not ouis_dict:
+                ouis_dict = read_json_file(self.json_file)
+            if not ouis_dict and self.bundled:
+                ouis_dict = read_bundled_index()
+            if stats is not None:
+                stats.stop('load')
+            # Readers holding the old copy keep using it safely
+            self._ouis_dict = ouis_dict
+            self._signature = signature
+            if self.cache is not None:
+                self.cache.clear()
+
+    def load(self):
+        """Load the data if not loaded yet. Return True if there is data"""
+        if self._ouis_dict is None:
+            self._load(self._stat_signature())
+        return bool(self._ouis_dict)
+
+    def reload_if_changed(self):
+        """Reload the data if the files changed. Return True if reloaded"""
+        signature = self._stat_signature()
+        if self._ouis_dict is not None and signature == self._signature:
+            return False
+        self._load(signature)
+        return True
+
+    @property
+    def loaded(self):
+        """True once the data has been loaded"""
+        return self._ouis_dict is not None
+
+    @property
+    def data(self):
+        """The loaded OuiIndex or dict of assignments"""
+        if self._ouis_dict is None:
+            self.load()
+        return self._ouis_dict
+
+    def _result(self, query, parsed, ouis_dict):
+        """Look up a ParsedMac. Return an OuiResult"""
+        if parsed is None:
+            return OuiResult(
+                query, None, None, None, None, None, 'unknown', None, 0, None,
+                )
+        value = parsed.value
+        addr_class = classify_mac(value) if value >> 40 & 3 else 'universal'
+        if addr_class not in _lookup_classes:
+            return OuiResult(
+                query, parsed.kind, value, parsed.mac, parsed.oui,
+                parsed.oui, 'unknown', None, 24, addr_class,
+                )
+        assignment, registry, vendor = find_int_prefix(
+            value, ouis_dict, 24 if parsed.kind == 'oui' else 48,
+            )
+        if addr_class == 'local' and vendor == 'unknown':
+            addr_class = 'random'
+        return OuiResult(
+            query, parsed.kind, value, parsed.mac, parsed.oui,
+            assignment, vendor, registry, len(assignment) * 4, addr_class,
+            )
+
+    def lookup(self, mac):
+        """Takes a MAC/OUI str with any separators. Returns an OuiResult"""
+        if self.cache is not None:
+            return self.lookup_many([mac])[0]
+        return self._result(mac, parse_mac(mac), self.data)
+
+    def lookup_int(self, intmac):
+        """Takes a 48-bit MAC int. Returns an OuiResult"""
+        try:
+            intmac = operator.index(intmac)
+        except TypeError:
+            return self._result(intmac, None, self.data)
+        if not 0 <= intmac <= 0xffffffffffff:
+            return self._result(intmac, None, self.data)
+        raw = intmac.to_bytes(6, 'big')
+        parsed = ParsedMac(
+            'mac', intmac, raw.hex(':').upper(), raw[:3].hex().upper(),
+            )
+        return self._result(intmac, parsed, self.data)
+
+    def lookup_array(self, macs):
+        """Takes an array-like of 48-bit MAC ints, e.g. a NumPy uint64
+        column. Returns a tuple of a NumPy int64 array of vendor string ids
+        and the list of vendor names they index, where -1 gives 'unknown'.
+        Needs NumPy. Vendor string ids are only stable for one load of the
+        data.
+        """
+        np = import_numpy()
+        ouis_dict = self.data
+        if (stats := self.stats) is not None:
+            stats.start()
+        if isinstance(ouis_dict, OuiIndex):
+            vids = ouis_dict.lookup_array(macs)
+            table = ouis_dict.vendor_table()
+        else:
+            # A JSON dict has no vendor ids, number the vendors found
+            macs = np.asarray(macs, dtype=np.uint64)
+            values, inverse = np.unique(macs, return_inverse=True)
+            table, ids, found = [], {}, []
+            for value in values.tolist():
+                vendor = self.lookup_int(value).vendor
+                if vendor == 'unknown':
+                    found.append(-1)
+                    continue
+                key = vendor if isinstance(vendor, str) else tuple(vendor)
+                if key not in ids:
+                    ids[key] = len(table)
+                    table.append(vendor)
+                found.append(ids[key])
+            table.append('unknown')
+            vids = np.array(found, dtype=np.int64)[inverse].reshape(
+                macs.shape,
+                )
+        if stats is not None:
+            stats.stop('lookup')
+            stats.count(
+                lookups=vids.size, unknown=int(np.count_nonzero(vids < 0)),
+                )
+        return vids, table
+
+    def search_vendor(self, pattern):
+        """Takes a vendor search pattern, see `vendor_needle`. Returns the
+        assignments of the matching vendors as a list of VendorAssignment,
+        in MAC order.
+        """
+        ouis_dict = self.data
+        found = []
+        if isinstance(ouis_dict, OuiIndex):
+            for vid in ouis_dict.search_vendors(pattern):
+                vendor = ouis_dict.vendor(vid)
+                found += [
+                    (key, bits, registry, vendor)
+                    for key, bits, registry in ouis_dict.assignments(vid)
+                    ]
+        elif ouis_dict and (needle := vendor_needle(pattern)):
+            # A JSON dict has no vendor index, check every assignment
+            for assignment, org in ouis_dict.items():
+                if len(assignment) not in _prefix_digits:
+                    continue
+                if needle in delimit_vendor(org):
+                    found.append((
+                        int(assignment, base=16), len(assignment) * 4, None,
+                        org,
+                        ))
+        found.sort(key=lambda item: (item[0] << 48 - item[1], item[1]))
+        return [
+            VendorAssignment(
+                f"{key:0{bits // 4}X}", format_prefix(key, bits), registry,
+                bits, vendor,
+                )
+            for key, bits, registry, vendor in found
+            ]
+
+    def _results(self, macs, ouis_dict):
+        """Parse and look up a list of MAC/OUI str. Returns OuiResults"""
+        if (stats := self.stats) is None:
+            return [
+                self._result(mac, parsed, ouis_dict)
+                for mac, parsed in zip(macs, parse_macs(macs))
+                ]
+        stats.start()
+        parsed_macs = parse_macs(macs)
+        stats.stop('parse')
+        stats.start()
+        results = [
+            self._result(mac, parsed, ouis_dict)
+            for mac, parsed in zip(macs, parsed_macs)
+            ]
+        stats.stop('lookup')
+        stats.count(lookups=len(results), unknown=sum(
+            1 for result in results
+            if result.vendor == 'unknown' and result.valid
+            ))
+        return results
+
+    def lookup_many(self, macs):
+        """Takes an iterable of MAC/OUI str. Returns a list of OuiResult"""
+        macs = list(macs)
+        ouis_dict = self.data
+        if self.cache is None:
+            return self._results(macs, ouis_dict)
+        try:
+            results = self.cache.get_many(macs)
+        except TypeError:
+            # Unhashable queries, e.g. lists, are looked up uncached
+            return self._results(macs, ouis_dict)
+        missing = list(dict.fromkeys(
+            mac for mac, result in zip(macs, results) if result is None
+            ))
+        if missing:
+            new_results = dict(zip(
+                missing, self._results(missing, ouis_dict),
+                ))
+            self.cache.put_many(new_results)
+            results = [
+                new_results[mac] if result is None else result
+                for mac, result in zip(macs, results)
+                ]
+        return results
+
+
+class AsyncOuiDatabase:
+    """An asyncio front end of OuiDatabase. File and network work runs in
+    an executor, the loop's default one unless given, so the event loop
+    never blocks. lookup_many yields to the loop between chunks of a big
+    batch. The wrapped OuiDatabase is available as `database`.
+    """
+
+    def __init__(self, index_file=None, json_file=None, cache_size=0,
+                 executor=None, database=None):
+        self.database = database or OuiDatabase(
+            index_file, json_file, cache_size,
+            )
+        self.executor = executor
+
+    async def _run(self, func, *args):
+        """Run a blocking function in the executor and await its result"""
+        import asyncio
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    async def load(self):
+        """Load the data if not loaded yet. Return True if there is data"""
+        return await self._run(self.database.load)
+
+    async def reload_if_changed(self):
+        """Reload the data if the files changed. Return True if reloaded"""
+        return await self._run(self.database.reload_if_changed)
+
+    async def refresh(self, registries=None):
+        """Download the registries that changed, rebuild the data files and
+        reload them. Return True on success.
+        """
+        refreshed = await self._run(
+            refresh_ieee_registries, registries,
+            self.database.index_file, self.database.json_file,
+            )
+        if refreshed:
+            await self.reload_if_changed()
+        return refreshed
+
+    async def lookup(self, mac):
+        """Takes a MAC/OUI str with any separators. Returns an OuiResult"""
+        if not self.database.loaded:
+            await self.load()
+        return self.database.lookup(mac)
+
+    async def search_vendor(self, pattern):
+        """Takes a vendor search pattern. Returns a list of VendorAssignment"""
+        if not self.database.loaded:
+            await self.load()
+        return self.database.search_vendor(pattern)
+
+    async def lookup_many(self, macs, chunk_size=None):
+        """Takes an iterable of MAC/OUI str. Returns a list of OuiResult.
+        Yields to the event loop after every chunk_size lookups.
+        """
+        import asyncio
+        if not self.database.loaded:
+            await self.load()
+        results = []
+        for chunk in batched(macs, chunk_size):
+            results += self.database.lookup_many(chunk)
+            await asyncio.sleep(0)
+        return results
+
+
+_default_database = None
+
+
+def default_database():
+    """Return the shared OuiDatabase for the user data files"""
+    global _default_database
+    if _default_database is None:
+        _default_database = OuiDatabase()
+    return _default_database
+
+
+def write_user_data_files(oui_dicts, index_file=None, json_file=None,
+                          sources=None):
+    """Takes a dict of registry: oui_dict pairs. Writes them merged to the
+    JSON file and to the index, with the sources of `compile_sources` if
+    any, and saves a snapshot of the index. Defaults to the user index and
+    JSON files. Returns True on success.
+    """
+    index_file = pathlib.Path(index_file or _user_index_file)
+    json_file = pathlib.Path(json_file or _user_json_file)
+    ouis_dict = {}
+    for registry_dict in oui_dicts.values():
+        ouis_dict.update(registry_dict)
+    make_config_dir()
+    for file, writer, data in [
+            (json_file, write_json_file, ouis_dict),
+            (index_file, functools.partial(
+                write_index_file, sources=sources,
+                ), oui_dicts),
+            ]:
+        try:
+            numbytes = writer(data, file)
+        except OSError as err:
+            print(
+                f"There was an error saving file '{file}': {err}",
+                file=sys.stderr,
+                )
+            return False
+        print(f"Success. Wrote {numbytes} bytes to '{file}'", file=sys.stderr)
+    save_snapshot(index_file)
+    return True
+
+
+def convert_user_csv_file_to_user_json_file():
+    """Converts the registry CSV files and saves to JSON and index files"""
+    print(
+        f"Converting '{_user_csv_file}' to '{_user_json_file}'...",
+        file=sys.stderr,
+        )
+    return write_user_data_files(convert_registry_csv_files())
+
+
+def diff_oui_dicts(old_dicts, new_dicts):
+    """Compare two dicts of registry: oui_dict pairs.
+    Returns a dict of registry: (added, removed, changed) assignment lists.
+    """
+    diff = {}
+    for registry in {**old_dicts, **new_dicts}:
+        old = old_dicts.get(registry, {})
+        new = new_dicts.get(registry, {})
+        diff[registry] = (
+            sorted(new.keys() - old.keys()),
+            sorted(old.keys() - new.keys()),
+            sorted(
+                oui for oui in new.keys() & old.keys()
+                if new[oui] != old[oui]
+                ),
+            )
+    return diff
+
+
+def update_user_data_files(changed=None, registries=None, index_file=None,
+                           json_file=None):
+    """Rebuild the JSON and index files from the registry CSV files.
+    Only registries in changed are parsed again; the others are taken from
+    the current index. Prints the added, removed and changed assignments.
+    Files are replaced atomically, and not at all if nothing changed.
+    Defaults to the user registry, index and JSON files.
+    """
+    registries = registries or _ieee_registries
+    index_file = pathlib.Path(index_file or _user_index_file)
+    json_file = pathlib.Path(json_file or _user_json_file)
+    current = read_index_file(index_file)
+    old_dicts = current.to_dicts() if current else {}
+    if current:
+        current.close()
+    new_dicts = {}
+    for registry, (csv_file, url, bits) in registries.items():
+        reuse = changed is not None and registry not in changed
+        if reuse and registry in old_dicts:
+            new_dicts[registry] = old_dicts[registry]
+        elif csv_file.exists():
+            new_dicts[registry] = convert_csv_to_oui_dict(csv_file)
+    diff = diff_oui_dicts(old_dicts, new_dicts)
+    for registry, (added, removed, changes) in diff.items():
+        print(
+            f"  {registry}: {len(added):,} added, {len(removed):,} removed, "
+            f"{len(changes):,} changed",
+            file=sys.stderr,
+            )
+    if all([
+            not any(any(lists) for lists in diff.values()),
+            is_current_index_file(index_file),
+            json_file.exists(),
+            ]):
+        print('OUI data is up to date.', file=sys.stderr)
+        return True
+    return write_user_data_files(new_dicts, index_file, json_file)
+
+
+def compile_sources(sources=None, index_file=None, json_file=None):
+    """Merge the assignments of several source files into one index and
+    JSON file. sources is a list of (name, format, file) tuples, highest
+    priority first, see `parse_source_spec`. Defaults to the saved sources.
+    Where sources assign the same prefix only the first one keeps it, so a
+    lookup is still one probe per prefix length, and the registry of a
+    result names the source that won. Nothing is written unless the
+    content hash of a source changed. Returns True on success.
+    """
+    if sources is None:
+        sources = read_user_sources()
+    index_file = pathlib.Path(index_file or _user_index_file)
+    json_file = pathlib.Path(json_file or _user_json_file)
+    manifest = []
+    for name, fmt, file in expand_sources(sources):
+        if not file.exists():
+            print(
+                f"[WARNING]: Skipping source `{name}`, no file `{file}`",
+                file=sys.stderr,
+                )
+            continue
+        if name in (item[0] for item in manifest):
+            print(
+                f"[ERROR]: Source name `{name}` is used more than once",
+                file=sys.stderr,
+                )
+            return False
+        manifest.append([name, fmt, str(file), hash_file(file)])
+    if not manifest:
+        print(
+            f"[ERROR]: No source files to compile.\n"
+            f"Use the `--download` option or give `--compile` sources.",
+            file=sys.stderr,
+            )
+        return False
+    current = read_index_file(index_file)
+    compiled = current.sources if current else []
+    if current:
+        current.close()
+    if compiled == manifest and json_file.exists():
+        print('OUI data is up to date.', file=sys.stderr)
+        return True
+    oui_dicts = {}
+    assigned = set()
+    for name, fmt, file, digest in manifest:
+        oui_dicts[name] = {
+            oui: org
+            for oui, org in convert_source_to_oui_dict(file, fmt).items()
+            if oui not in assigned
+            }
+        assigned.update(oui_dicts[name])
+        print(
+            f"  {name}: {len(oui_dicts[name]):,} assignments from `{file}`",
+            file=sys.stderr,
+            )
+    return write_user_data_files(oui_dicts, index_file, json_file, manifest)
+
+
+def compile_user_sources(sources):
+    """Save the `--compile` sources, if any, and compile the saved ones"""
+    if sources:
+        write_user_sources(sources)
+    return compile_sources()
+
+
+def refresh_ieee_registries(registries=None, index_file=None,
+                            json_file=None):
+    """Download changed registries and update the data files.
+    With saved `--compile` sources, those are compiled instead.
+    """
+    statuses = download_ieee_registries(registries)
+    if statuses is None:
+        return False
+    if registries is None and _user_sources_file.exists():
+        return compile_sources(None, index_file, json_file)
+    changed = {
+        registry for registry, status in statuses.items()
+        if status == 'modified'
+        }
+    return update_user_data_files(changed, registries, index_file, json_file)
+
+
+def check_user_data_files():
+    """Verify user files exist. Convert CSV to JSON and index if possible"""
+    if _user_csv_file.exists() and not all([
+            _user_json_file.exists(), is_current_index_file(_user_index_file),
+            ]):
+        print(
+            f"Can not find file {_user_json_file} or {_user_index_file}",
+            file=sys.stderr,
+            )
+        print(f"Found source file {_user_csv_file}.", file=sys.stderr)
+        if _user_sources_file.exists():
+            if not compile_sources():
+                return False
+        elif not convert_user_csv_file_to_user_json_file():
+            return False
+    if not any([_user_index_file.exists(), _user_json_file.exists()]):
+        if (bundled := read_bundled_index()) is not None:
+            # Released packages ship an index, no download needed
+            bundled.close()
+            return True
+        print(
+            f"[ERROR]: Could not read OUI data.`{_user_index_file}`.\n"
+            f"Use the `--download` option and try again.",
+            file=sys.stderr,
+            )
+        return False
+    return True
+
+
+Snapshot = collections.namedtuple(
+    'Snapshot', ['date', 'digest', 'assignments', 'file'],
+    )
+Snapshot.__doc__ = """A dated version of an index in the snapshot store.
+date is when it became current as `YYYY-MM-DDTHH:MM:SS`, digest is the
+SHA-256 of the index file and file holds the assignments that changed
+since the snapshot before it.
+"""
+
+
+def snapshot_dir(index_file=None):
+    """Return the snapshot store of an index, next to it"""
+    return pathlib.Path(index_file or _user_index_file).parent / 'snapshots'
+
+
+def read_snapshots(index_file=None):
+    """Return the snapshots of an index as a list of Snapshot, oldest first"""
+    store = snapshot_dir(index_file)
+    return [
+        Snapshot(
+            date, digest, assignments,
+            store / f"{date.replace(':', '')}.json.gz",
+            )
+        for date, digest, assignments in read_json_file(
+            store / 'snapshots.json',
+            )
+        ]
+
+
+def diff_snapshot_dicts(old_dicts, new_dicts):
+    """Takes two dicts of registry: oui_dict pairs. Returns what turns the
+    old into the new as a dict of registry: [oui_dict, removed] pairs, the
+    assignments added or changed and the list of those removed.
+    """
+    return {
+        registry: [
+            {oui: new_dicts[registry][oui] for oui in added + changes},
+            removed,
+            ]
+        for registry, (added, removed, changes) in diff_oui_dicts(
+            old_dicts, new_dicts,
+            ).items()
+        if added or removed or changes or registry not in old_dicts
+        }
+
+
+def apply_snapshot_file(oui_dicts, file):
+    """Takes a dict of registry: oui_dict pairs and a snapshot file.
+    Applies the changes in the file to oui_dicts and returns it.
+    """
+    import gzip
+    import json
+    with gzip.open(file, 'rt', encoding='utf-8') as f:
+        changes = json.load(f)
+    for registry, (oui_dict, removed) in changes.items():
+        registry_dict = oui_dicts.setdefault(registry, {})
+        for oui in removed:
+            registry_dict.pop(oui, None)
+        registry_dict.update(oui_dict)
+    return oui_dicts
+
+
+def write_snapshot_file(old_dicts, new_dicts, file):
+    """Takes two dicts of registry: oui_dict pairs and a pathlib file.
+    Writes the changes from the old to the new, gzipped JSON.
+    Returns the number of bytes written.
+    """
+    import gzip
+    import json
+    return write_file_atomic(file, gzip.compress(
+        json.dumps(diff_snapshot_dicts(old_dicts, new_dicts)).encode(),
+        mtime=0,
+        ))
+
+
+def save_snapshot(index_file=None, date=None):
+    """Add an index file to its snapshot store, dated now unless a date is
+    given. A snapshot is only added when the index differs from the one
+    before it, and only the assignments that changed are kept, so the store
+    grows with the changes, not with copies of the index.
+    Returns the Snapshot or None if it could not be saved.
+    """
+    import datetime
+    index_file = pathlib.Path(index_file or _user_index_file)
+    store = snapshot_dir(index_file)
+    date = date or datetime.datetime.now().isoformat(timespec='seconds')
+    try:
+        digest = hash_file(index_file)
+        with OuiIndex(index_file) as index:
+            assignments = len(index)
+            new_dicts = index.to_dicts()
+        snapshots = read_snapshots(index_file)
+        earlier = [snapshot for snapshot in snapshots if snapshot.date <= date]
+        if earlier and earlier[-1].digest == digest:
+            return earlier[-1]
+        later = snapshots[len(earlier):]
+        # A snapshot of the same second is replaced
+        replaced = earlier[-1:] if earlier and earlier[-1].date == date else []
+        earlier = earlier[:len(earlier) - len(replaced)]
+        old_dicts = {}
+        for snapshot in earlier:
+            apply_snapshot_file(old_dicts, snapshot.file)
+        if later:
+            # The changes of the next snapshot follow the replaced one
+            next_dicts = {
+                registry: dict(d) for registry, d in old_dicts.items()
+                }
+            for snapshot in replaced + later[:1]:
+                apply_snapshot_file(next_dicts, snapshot.file)
+        snapshot = Snapshot(
+            date, digest, assignments,
+            store / f"{date.replace(':', '')}.json.gz",
+            )
+        store.mkdir(parents=True, exist_ok=True)
+        write_snapshot_file(old_dicts, new_dicts, snapshot.file)
+        if later:
+            # The next snapshot now follows this one
+            write_snapshot_file(new_dicts, next_dicts, later[0].file)
+        write_json_file(
+            [each[:3] for each in earlier + [snapshot] + later],
+            store / 'snapshots.json',
+            )
+    except (OSError, ValueError, struct.error) as err:
+        print(
+            f"[WARNING]: Could not save a snapshot of `{index_file}`: {err}",
+            file=sys.stderr,
+            )
+        return None
+    return snapshot
+
+
+def snapshot_dicts(snapshot, index_file=None):
+    """Takes a Snapshot. Returns its data as a dict of registry: oui_dict
+    pairs, by applying the changes of every snapshot up to it.
+    Raises ValueError if it is not in the store of index_file.
+    """
+    oui_dicts = {}
+    for each in read_snapshots(index_file):
+        apply_snapshot_file(oui_dicts, each.file)
+        if each == snapshot:
+            return oui_dicts
+    raise ValueError(f"No snapshot dated {snapshot.date}")
+
+
+def snapshot_index(snapshot, index_file=None):
+    """Takes a Snapshot. Returns the pathlib file of its index, rebuilt
+    from `snapshot_dicts` on first use and kept in the store under its
+    digest, so later uses map it like the current index. Each kept index
+    takes as much space as the current one.
+    """
+    file = snapshot_dir(index_file) / f"{snapshot.digest}.idx"
+    if not is_current_index_file(file):
+        write_index_file(snapshot_dicts(snapshot, index_file), file)
+    return file
+
+
+def normalize_snapshot_date(text):
+    """Takes a date as `YYYY-MM-DD` or `YYYY-MM-DDTHH:MM[:SS]`. Returns it
+    as a snapshot date, where a day means its end. Raises
+    argparse.ArgumentTypeError if it is not valid.
+    """
+    import datetime
+    try:
+        date = datetime.datetime.fromisoformat(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"invalid date `{text}`, expected YYYY-MM-DD[THH:MM[:SS]]"
+            ) from None
+    if len(text) == 10:
+        date = date.replace(hour=23, minute=59, second=59)
+    return date.replace(tzinfo=None).isoformat(timespec='seconds')
+
+
+def find_snapshot(as_of, index_file=None):
+    """Takes a snapshot date. Returns the Snapshot that was current then,
+    the last one dated on or before it, or None.
+    """
+    found = None
+    for snapshot in read_snapshots(index_file):
+        if snapshot.date > as_of:
+            break
+        found = snapshot
+    return found
+
+
+def use_snapshot(as_of, index_file=None):
+    """Make the Snapshot current at a date the default database.
+    Its index is rebuilt on first use and mapped like the current one.
+    Returns the OuiDatabase it replaced, or None with an error if there is
+    no such snapshot.
+    """
+    global _default_database
+    snapshot = find_snapshot(as_of, index_file)
+    if snapshot is None:
+        print(
+            f"[ERROR]: No OUI data snapshot on or before {as_of}.\n"
+            f"Use the `--snapshots` option to list them.",
+            file=sys.stderr,
+            )
+        return None
+    try:
+        file = snapshot_index(snapshot, index_file)
+    except (OSError, ValueError) as err:
+        print(
+            f"[ERROR]: Could not rebuild the snapshot of {snapshot.date}: "
+            f"{err}",
+            file=sys.stderr,
+            )
+        return None
+    replaced = default_database()
+    _default_database = OuiDatabase(file, file.with_suffix('.json'))
+    return replaced
+
+
+def display_snapshots(index_file=None):
+    """Display the dated snapshots of the OUI data, oldest first"""
+    snapshots = read_snapshots(index_file)
+    if not snapshots:
+        print('No snapshots yet. They are saved when the data is updated.')
+        return False
+    print(f"{'date':<19}  {'digest':<12}  {'assignments':>11}")
+    for snapshot in snapshots:
+        print(
+            f"{snapshot.date:<19}  {snapshot.digest[:12]:<12}  "
+            f"{snapshot.assignments:>11,}"
+            )
+    return True
+
+
+def display_snapshot_diff(old_date, new_date, index_file=None):
+    """Display the assignments added, removed and changed between the
+    snapshots current at two dates
+    """
+    snapshots = []
+    for as_of in [old_date, new_date]:
+        if (snapshot := find_snapshot(as_of, index_file)) is None:
+            print(
+                f"[ERROR]: No OUI data snapshot on or before {as_of}.",
+                file=sys.stderr,
+                )
+            return False
+        try:
+            snapshots.append((snapshot, snapshot_dicts(snapshot, index_file)))
+        except (OSError, ValueError) as err:
+            print(
+                f"[ERROR]: Could not read the snapshot of {snapshot.date}: "
+                f"{err}",
+                file=sys.stderr,
+                )
+            return False
+    def name(org):
+        return org if isinstance(org, str) else '; '.join(org)
+    (old, old_dicts), (new, new_dicts) = snapshots
+    print(f"--- {old.date}  {old.digest[:12]}")
+    print(f"+++ {new.date}  {new.digest[:12]}")
+    for registry, (added, removed, changes) in diff_oui_dicts(
+            old_dicts, new_dicts,
+            ).items():
+        old_dict = old_dicts.get(registry, {})
+        new_dict = new_dicts.get(registry, {})
+        lines = [
+            *(f"+ {oui:<9}  {name(new_dict[oui])}" for oui in added),
+            *(f"- {oui:<9}  {name(old_dict[oui])}" for oui in removed),
+            *(
+                f"~ {oui:<9}  {name(old_dict[oui])} -> "
+                f"{name(new_dict[oui])}"
+                for oui in changes
+                ),
+            ]
+        if lines:
+            print(f"{registry}:")
+            print('\n'.join(lines))
+    return True
+
+
+def read_stdin_to_list(stdin):
+    """Input a stdin file obj. Return list of lines"""
+    with stdin as f:
+        data = [line.strip() for line in f]
+    return data
+
+
+def read_file_to_list(file=None, quiet=False):
+    """Input a pathlib file obj. Return list of lines"""
+    if not file:
+        return False
+    elif isinstance(file, str):
+        file = pathlib.Path(file)
+    if not file.exists():
+        if not quiet:
+            print(f"Could not open file: `{file}`")
+        return False
+    elif not file.stat().st_size:
+        if not quiet:
+            print(f"[WARNING]: No data found in file: `{file}`")
+        return False
+    else:
+        with file.open(encoding='utf-8') as f:
+            data = [line.strip() for line in f]
+    return data
+
+
+def iter_stream_batches(stream):
+    """Input a binary file obj. Yield lists of stripped lines as they arrive.
+    Each read returns what is available, so a slow pipe is not held back
+    until a full chunk or EOF, and memory stays bounded by the chunk size.
+    """
+    read = getattr(stream, 'read1', stream.read)
+    pending = b''
+    while (chunk := read(_read_chunk_size)):
+        lines = (pending + chunk).split(b'\n')
+        pending = lines.pop()
+        if lines:
+            yield [
+                line.decode('utf-8', errors='replace').strip()
+                for line in lines
+                ]
+    if pending:
+        yield [pending.decode('utf-8', errors='replace').strip()]
+
+
+def iter_stdin_batches(stdin):
+    """Input a stdin file obj. Yield lists of lines as they arrive"""
+    with stdin as f:
+        yield from iter_stream_batches(getattr(f, 'buffer', f))
+
+
+def check_input_file(file, quiet=False):
+    """Input a pathlib file obj or str. Warns if it is missing or empty.
+    Returns the pathlib file obj, or None if there is nothing to read.
+    """
+    if not file:
+        return None
+    elif isinstance(file, str):
+        file = pathlib.Path(file)
+    if not file.exists():
+        if not quiet:
+            print(f"Could not open file: `{file}`", file=sys.stderr)
+        return None
+    elif not file.stat().st_size:
+        if not quiet:
+            print(
+                f"[WARNING]: No data found in file: `{file}`",
+                file=sys.stderr,
+                )
+        return None
+    return file
+
+
+def iter_file_batches(file=None, quiet=False):
+    """Input a pathlib file obj. Yield lists of lines read in chunks"""
+    if not (file := check_input_file(file, quiet)):
+        return
+    with file.open('rb') as f:
+        yield from iter_stream_batches(f)
+
+
+def iter_stream_chunks(stream, size=None):
+    """Input a binary file obj. Yield bytes holding whole lines, up to about
+    size bytes each, as they arrive.
+    """
+    read = getattr(stream, 'read1', stream.read)
+    size = size or _extract_chunk_size
+    pending = b''
+    while (chunk := read(size)):
+        chunk = pending + chunk if pending else chunk
+        end = chunk.rfind(b'\n') + 1
+        pending = chunk[end:]
+        if end:
+            yield chunk[:end]
+    if pending:
+        yield pending
+
+
+class FileFollower:
+    """Reads files and then the lines appended to them, like `tail -F`.
+    A file that is replaced, e.g. by log rotation, is read to its end and
+    the new file is opened. A truncated file is read again from the start.
+    Files that do not exist yet are opened when they appear.
+    """
+
+    def __init__(self, files, quiet=False, interval=None):
+        self.files = [pathlib.Path(file) for file in files]
+        self.quiet = quiet
+        self.interval = interval or _follow_interval
+        self._state = {}
+
+    def __iter__(self):
+        """Yield bytes holding whole lines as they are appended. Only ends
+        when interrupted. Sleeps between polls only while all are idle.
+        """
+        for file in self.files:
+            if not self._open(file):
+                self._warn(f"Waiting for file to appear: `{file}`")
+        try:
+            while True:
+                idle = True
+                for file in self.files:
+                    if (chunk := self.read(file)):
+                        idle = False
+                        yield chunk
+                if idle:
+                    time.sleep(self.interval)
+        finally:
+            self.close()
+
+    def _warn(self, message):
+        """Print a warning on stderr unless quiet"""
+        if not self.quiet:
+            print(f"[WARNING]: {message}", file=sys.stderr, flush=True)
+
+    def _open(self, file):
+        """Open file for reading if it exists. Return True if opened"""
+        try:
+            f = file.open('rb', buffering=0)
+        except OSError:
+            return False
+        st = os.fstat(f.fileno())
+        self._state[file] = [f, (st.st_dev, st.st_ino), b'']
+        return True
+
+    def read(self, file):
+        """Return the whole lines appended to file since the last read,
+        or b'' if there are none yet.
+        """
+        if file not in self._state and not self._open(file):
+            return b''
+        state = self._state[file]
+        f, identity, pending = state
+        data = f.read(_extract_chunk_size)
+        if not data:
+            try:
+                st = file.stat()
+            except OSError:
+                # Moved away and not recreated yet, keep the old file
+                return b''
+            if (st.st_dev, st.st_ino) != identity:
+                self._warn(
+                    f"File was replaced, following the new file: `{file}`"
+                    )
+                data = pending + f.read()
+                f.close()
+                del self._state[file]
+                self._open(file)
+                if data and not data.endswith(b'\n'):
+                    data += b'\n'
+                return data
+            if st.st_size < f.tell():
+                self._warn(f"File was truncated: `{file}`")
+                f.seek(0)
+                state[2] = b''
+            return b''
+        data = pending + data if pending else data
+        end = data.rfind(b'\n') + 1
+        state[2] = data[end:]
+        return data[:end]
+
+    def close(self):
+        """Close the followed files"""
+        for f, identity, pending in self._state.values():
+            f.close()
+        self._state.clear()
+
+
+def iter_input_chunks(macs=(), pipe=None, files=(), quiet=False,
+                      follow=False):
+    """Yield bytes of text from arguments, then stdin, then files.
+    With follow, the files are followed and this never ends.
+    """
+    if macs:
+        yield ''.join(f"{text}\n" for text in macs).encode('utf-8')
+    if pipe:
+        with pipe as f:
+            yield from iter_stream_chunks(getattr(f, 'buffer', f))
+    if follow and files:
+        yield from FileFollower(files, quiet)
+        return
+    for file in files:
+        if (file := check_input_file(file, quiet)):
+            with file.open('rb') as f:
+                yield from iter_stream_chunks(f)
+
+
+def iter_input_batches(macs=(), pipe=None, files=(), quiet=False,
+                       follow=False):
+    """Yield batches of MACs from arguments, then stdin, then files.
+    With follow, the files are followed and this never ends.
+    """
+    if macs:
+        yield list(macs)
+    if pipe:
+        yield from iter_stdin_batches(pipe)
+    if follow and files:
+        for chunk in FileFollower(files, quiet):
+            yield [
+                line.decode('utf-8', errors='replace').strip()
+                for line in chunk[:-1].split(b'\n')
+                ]
+        return
+    for file in files:
+        yield from iter_file_batches(file, quiet)
+
+
+# Whole MACs in free text: colon, dash and Cisco dotted forms, on word
+# boundaries and not part of a longer run of hex groups in the same style.
+# The colon form is not taken next to a colon either, as in IPv6 addresses
+# like `fe80::e8:0a:b9:00:c1:a2`.
+# The pattern runs on a copy of the text with every hex digit masked to `h`,
+# so it starts with a literal the regex engine can skip ahead to quickly.
+_hex_mask_table = bytes.maketrans(
+    string.hexdigits.encode('ascii'), b'h' * len(string.hexdigits),
+    )
+_mac_token_pattern = rb'''(?x) hh (?<!\whh) (?:
+    : (?<!:hh:) hh:hh:hh:hh:hh (?!\w|:[h:])
+  | - (?<!h-hh-) hh-hh-hh-hh-hh (?!\w|-h)
+  | hh\. (?<!h\.hhhh\.) hhhh\.hhhh (?!\w|\.h)
+  )'''
+
+
+def find_mac_spans(data):
+    """Takes bytes of free text. Returns the (start, end) offsets of the
+    MACs in it, found in a single pass of one compiled pattern.
+    """
+    import re
+    pattern = re.compile(_mac_token_pattern)
+    masked = data.translate(_hex_mask_table)
+    return [match.span() for match in pattern.finditer(masked)]
+
+
+def extract_macs(data):
+    """Takes bytes of free text. Returns the MAC tokens in it as str"""
+    return [
+        data[start:end].decode('ascii') for start, end in find_mac_spans(data)
+        ]
+
+
+def iter_extracted_batches(chunks):
+    """Takes an iterable of bytes. Yield the lists of MACs found in each"""
+    for chunk in chunks:
+        if (macs := extract_macs(chunk)):
+            yield macs
+
+
+def annotate_text(data, database, registry=False, cache=None):
+    """Takes bytes of free text. Returns them as str with the vendor in
+    brackets after each MAC. An optional LookupCache holds the labels of
+    repeated MACs.
+    """
+    if not (spans := find_mac_spans(data)):
+        return data.decode('utf-8', errors='replace')
+    tokens = list({data[start:end] for start, end in spans})
+    if cache is not None:
+        labels = dict(zip(tokens, cache.get_many(tokens)))
+    else:
+        labels = dict.fromkeys(tokens)
+    if (missing := [token for token in tokens if labels[token] is None]):
+        results = database.lookup_many(
+            [token.decode('ascii') for token in missing]
+            )
+        new_labels = {}
+        for token, result in zip(missing, results):
+            vendor = result.vendor
+            if not isinstance(vendor, str):
+                vendor = '; '.join(vendor)
+            if result.addr_class not in _lookup_classes:
+                vendor = result.addr_class
+            if registry:
+                vendor = f"{result.registry or '-'}/{result.bits} {vendor}"
+            new_labels[token] = f" [{vendor}]".encode('utf-8')
+        labels.update(new_labels)
+        if cache is not None:
+            cache.put_many(new_labels)
+    pieces, last = [], 0
+    for start, end in spans:
+        pieces += [data[last:end], labels[data[start:end]]]
+        last = end
+    pieces.append(data[last:])
+    return b''.join(pieces).decode('utf-8', errors='replace')
+
+
+def batched(iterable, size=None):
+    """Yield lists of up to size items from an iterable"""
+    size = size or _batch_size
+    iterator = iter(iterable)
+    while (batch := list(itertools.islice(iterator, size))):
+        yield batch
+
+
+def strip_list_items(a_list):
+    """Convert the list or file obj to usable format"""
+    data = [i.strip() for i in a_list]
+    return data
+
+
+def format_result(result, registry=False):
+    """Takes an OuiResult. Returns its report line. The address class
+    follows the vendor unless it is `universal`.
+    """
+    vendor = result.vendor
+    if result.addr_class != 'universal':
+        vendor = f"{vendor}  ({result.addr_class})"
+    if registry:
+        prefix = f"{result.registry or '-'}/{result.bits}"
+        return f"{result.mac}  {result.assignment}  {prefix}  {vendor}"
+    return f"{result.mac}  {result.assignment}  {vendor}"
+
 
+_result_row = operator.attrgetter(*_result_fields)
 
-def read_stdin_to_list(stdin):
-    """Input a stdin file obj. Return list of lines"""
-    with stdin as f:
-        data = [line.strip() for line in f]
-    return data
 
+class _LineEcho:
+    """A csv writer target whose write returns the formatted line"""
+    write = staticmethod(str)
 
-def read_file_to_list(file=None, quiet=False):
-    """Input a pathlib file obj. Return list of lines"""
-    if not file:
+
+def format_lines(results, fmt='text', registry=False):
+    """Takes valid OuiResults and an output format.
+    Returns a list of report lines, each ending in a newline.
+    """
+    if fmt == 'text':
+        return [f"{format_result(result, registry)}\n" for result in results]
+    return format_rows(map(_result_row, results), _result_fields, fmt)
+
+
+def format_rows(rows, fields, fmt):
+    """Takes tuples of the values of fields and a jsonl, csv or tsv format.
+    The last value may be a list of names. Returns a list of lines.
+    """
+    if fmt == 'jsonl':
+        def value(obj):
+            if obj.__class__ is str:
+                return quote(obj)
+            elif obj is None:
+                return 'null'
+            elif obj.__class__ is int:
+                return str(obj)
+            return json.dumps(obj)
+        import json
+        # The C string quoting of json.dumps without its per call overhead
+        quote = json.encoder.encode_basestring_ascii
+        template = '{%s}\n' % ', '.join(
+            f"{quote(field)}: %s" for field in fields
+            )
+        return [template % tuple(map(value, row)) for row in rows]
+    import csv
+    writer = csv.writer(
+        _LineEcho, 'excel' if fmt == 'csv' else 'excel-tab',
+        lineterminator='\n',
+        )
+    return [
+        writer.writerow((*row[:-1], '; '.join(row[-1])
+                         if isinstance(row[-1], list) else row[-1]))
+        for row in rows
+        ]
+
+
+def format_results(results, fmt='text', registry=False):
+    """Takes OuiResults and an output format. Returns the report text of the
+    valid results and a list of the queries that are not valid.
+    """
+    valid, rejected = [], []
+    for result in results:
+        if result.valid:
+            valid.append(result)
+        else:
+            rejected.append(result.query)
+    return ''.join(format_lines(valid, fmt, registry)), rejected
+
+
+def format_macs(macs, database, fmt='text', registry=False, cache=None):
+    """Look up and format a batch of MAC/OUI str. Tokens found in the cache
+    of token: report line skip parsing, lookup and formatting.
+    Returns the report text and a list of the queries that are not valid.
+    """
+    if cache is None:
+        return format_results(database.lookup_many(macs), fmt, registry)
+    lines = cache.get_many(macs)
+    missing = list(dict.fromkeys(
+        mac for mac, line in zip(macs, lines) if line is None
+        ))
+    if missing:
+        results = database.lookup_many(missing)
+        valid = [result for result in results if result.valid]
+        new_lines = dict.fromkeys(missing, '')  # '' marks invalid queries
+        new_lines.update(zip(
+            (result.query for result in valid),
+            format_lines(valid, fmt, registry),
+            ))
+        cache.put_many(new_lines)
+        lines = [
+            new_lines[mac] if line is None else line
+            for mac, line in zip(macs, lines)
+            ]
+    rejected = [mac for mac, line in zip(macs, lines) if not line]
+    return ''.join(lines), rejected
+
+
+class LookupCache:
+    """A bounded least recently used cache with hit, miss and eviction
+    counters. None is never stored, it means not found. Safe to share
+    between threads.
+    """
+
+    def __init__(self, maxsize=None):
+        self.maxsize = _cache_size if maxsize is None else maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get_many(self, keys):
+        """Returns a list of the cached values of keys, None if missing"""
+        with self._lock:
+            get = self._data.get
+            move_to_end = self._data.move_to_end
+            values = []
+            for key in keys:
+                if (value := get(key)) is not None:
+                    move_to_end(key)
+                values.append(value)
+            misses = values.count(None)
+            self.hits += len(values) - misses
+            self.misses += misses
+        return values
+
+    def put_many(self, items):
+        """Takes a dict of key: value. Adds it, evicting the least recently
+        used entries beyond maxsize.
+        """
+        with self._lock:
+            data = self._data
+            data.update(items)
+            for key in items:
+                data.move_to_end(key)
+            excess = len(data) - self.maxsize
+            for _ in range(max(excess, 0)):
+                data.popitem(last=False)
+            self.evictions += max(excess, 0)
+
+    def get(self, key):
+        """Returns the cached value of key or None"""
+        return self.get_many([key])[0]
+
+    def put(self, key, value):
+        """Cache value for key"""
+        self.put_many({key: value})
+
+    def clear(self):
+        """Drop all entries. The counters are kept"""
+        with self._lock:
+            self._data.clear()
+
+    def add_counts(self, hits=0, misses=0, evictions=0):
+        """Add counters from another cache, e.g. one of a worker process"""
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+            self.evictions += evictions
+
+    def counts(self):
+        """Returns the hits, misses and evictions"""
+        return self.hits, self.misses, self.evictions
+
+    def stats(self):
+        """Returns a one line summary of the counters"""
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0
+        return (
+            f"cache: {self.hits:,} hits, {self.misses:,} misses, "
+            f"{self.evictions:,} evictions, {rate:.1%} hit rate, "
+            f"{len(self):,}/{self.maxsize:,} entries"
+            )
+
+
+def _order_key(names):
+    """Returns a sort key that puts names first, in order, then the rest"""
+    order = {name: i for i, name in enumerate(names)}
+    return lambda name: (order.get(name, len(order)), name)
+
+
+class RunStats:
+    """Counters and the wall and CPU time of each stage of a run, for
+    `--stats`. Read them as `counts` and as `times`, a dict of stage:
+    [wall seconds, CPU seconds]. Stages are timed per batch and may nest,
+    an outer stage only gets the time not spent in inner ones. Code that
+    takes a RunStats checks for one once per batch, which is all it costs
+    when there is none. Not safe to share between threads.
+    """
+    stages = (
+        'load', 'read', 'extract', 'parse', 'lookup', 'format', 'annotate',
+        'aggregate', 'search', 'write',
+        )
+    counters = (
+        'items', 'invalid', 'lookups', 'unknown', 'batches', 'bytes_in',
+        'bytes_out',
+        )
+
+    def __init__(self):
+        self.counts = collections.Counter()
+        self.times = {}
+        self._stack = []
+        self._started = time.perf_counter(), time.process_time()
+
+    def start(self):
+        """Start timing a stage"""
+        self._stack.append(
+            [time.perf_counter(), time.process_time(), 0.0, 0.0]
+            )
+
+    def stop(self, stage):
+        """Stop timing the last started stage and add its time to stage"""
+        wall, cpu, inner_wall, inner_cpu = self._stack.pop()
+        wall = time.perf_counter() - wall
+        cpu = time.process_time() - cpu
+        times = self.times.setdefault(stage, [0.0, 0.0])
+        times[0] += wall - inner_wall
+        times[1] += cpu - inner_cpu
+        if self._stack:
+            self._stack[-1][2] += wall
+            self._stack[-1][3] += cpu
+
+    def count(self, **counts):
+        """Add to the named counters"""
+        self.counts.update(counts)
+
+    def timed(self, iterable, stage='read'):
+        """Yield the items of iterable, timing each step as stage.
+        Batches read count towards `batches` and `bytes_in`.
+        """
+        iterator = iter(iterable)
+        while True:
+            self.start()
+            item = next(iterator, None)
+            self.stop(stage)
+            if item is None:
+                return
+            if stage == 'read':
+                self.counts['batches'] += 1
+                self.counts['bytes_in'] += (
+                    len(item) if isinstance(item, bytes)
+                    else sum(map(len, item)) + len(item)
+                    )
+            yield item
+
+    def take(self):
+        """Returns the times and counts and resets them, e.g. to merge the
+        stats of a worker process into the main one.
+        """
+        times, counts = self.times, dict(self.counts)
+        self.times, self.counts = {}, collections.Counter()
+        return times, counts
+
+    def merge(self, times, counts):
+        """Add the times and counts returned by `take` of another RunStats"""
+        for stage, (wall, cpu) in times.items():
+            total = self.times.setdefault(stage, [0.0, 0.0])
+            total[0] += wall
+            total[1] += cpu
+        self.counts.update(counts)
+
+    def report(self, cache=None):
+        """Returns a table of the stage times and the counters, followed by
+        the counters of an optional LookupCache.
+        """
+        wall = time.perf_counter() - self._started[0]
+        cpu = time.process_time() - self._started[1]
+        stages = sorted(self.times, key=_order_key(self.stages))
+        staged = sum(times[0] for times in self.times.values())
+        rows = [(stage, *self.times[stage]) for stage in stages]
+        rows += [
+            ('other', max(wall - staged, 0.0), max(
+                cpu - sum(times[1] for times in self.times.values()), 0.0,
+                )),
+            ('total', wall, cpu),
+            ]
+        lines = [f"{'stage':<10}  {'wall s':>9}  {'cpu s':>9}  {'wall %':>6}"]
+        lines += [
+            f"{stage:<10}  {stage_wall:>9.3f}  {stage_cpu:>9.3f}  "
+            f"{stage_wall / wall if wall else 0:>6.1%}"
+            for stage, stage_wall, stage_cpu in rows
+            ]
+        if self.counts:
+            lines.append('counts: ' + ', '.join(
+                f"{self.counts[name]:,} {name.replace('_', ' ')}"
+                for name in sorted(self.counts, key=_order_key(self.counters))
+                ))
+        if cache is not None:
+            lines.append(cache.stats())
+        return '\n'.join(lines)
+
+
+class ReportWriter:
+    """Writes batches of results to out with one write and flush per batch.
+    Queries that are not valid go to the rejects file, one per line, or
+    else to stderr as warnings unless quiet, so out only holds data.
+    An optional LookupCache holds the report lines of repeated MACs and
+    an optional RunStats times the formatting and writing.
+    """
+
+    def __init__(self, out=None, fmt='text', registry=False, quiet=False,
+                 rejects=None, cache=None, stats=None):
+        self.out = out or sys.stdout
+        self.fmt = fmt
+        self.registry = registry
+        self.quiet = quiet
+        self.rejects = rejects
+        self.cache = cache
+        self.stats = stats
+        self.fields = _result_fields
+        self._header = fmt in ('csv', 'tsv')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Close the rejects file"""
+        if self.rejects:
+            self.rejects.close()
+
+    def write_text(self, text, rejected=()):
+        """Write formatted report text and reject its invalid queries"""
+        if rejected:
+            self.reject(rejected)
+        if not text:
+            return
+        if self._header:
+            self._header = False
+            sep = ',' if self.fmt == 'csv' else '\t'
+            text = f"{sep.join(self.fields)}\n{text}"
+        self.write_raw(text)
+
+    def write_raw(self, text):
+        """Write text as is and flush the output"""
+        if (stats := self.stats) is not None:
+            stats.start()
+        self.out.write(text)
+        self.out.flush()
+        if stats is not None:
+            stats.stop('write')
+            stats.count(bytes_out=len(text.encode('utf-8')))
+
+    def write(self, results):
+        """Format and write a batch of OuiResults"""
+        self.write_text(*format_results(results, self.fmt, self.registry))
+
+    def write_macs(self, macs, database):
+        """Look up, format and write a batch of MAC/OUI str"""
+        if (stats := self.stats) is None:
+            return self.write_text(*format_macs(
+                macs, database, self.fmt, self.registry, self.cache,
+                ))
+        stats.start()
+        text, rejected = format_macs(
+            macs, database, self.fmt, self.registry, self.cache,
+            )
+        stats.stop('format')
+        stats.count(items=len(macs), invalid=len(rejected))
+        self.write_text(text, rejected)
+
+    def reject(self, queries):
+        """Record queries that are not a valid MAC/OUI"""
+        if self.rejects:
+            self.rejects.write(''.join(f"{query}\n" for query in queries))
+            self.rejects.flush()
+        elif not self.quiet:
+            sys.stderr.write(''.join(
+                f"[WARNING]: Not a valid MAC/OUI address: `{query}`\n"
+                for query in queries
+                ))
+            sys.stderr.flush()
+
+
+def _mix64(value):
+    """Takes an int. Returns a well mixed 64-bit hash (splitmix64)"""
+    value = (value + 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+    return value ^ (value >> 31)
+
+
+class HyperLogLog:
+    """Approximate count of distinct ints in 2**precision bytes.
+    The standard error is about 1.04 / sqrt(2**precision). The first few
+    ints are kept in a set and counted exactly, so sketches of rarely seen
+    keys stay small.
+    """
+
+    def __init__(self, precision=_hll_precision):
+        self.precision = precision
+        self.registers = None
+        self.values = set()
+
+    def _add(self, value):
+        """Add an int to the registers"""
+        h = _mix64(value)
+        bits = 64 - self.precision
+        i = h >> bits
+        rank = bits - (h & ((1 << bits) - 1)).bit_length() + 1
+        if rank > self.registers[i]:
+            self.registers[i] = rank
+
+    def add(self, value):
+        """Add an int"""
+        if self.registers is not None:
+            self._add(value)
+            return
+        self.values.add(value)
+        if len(self.values) > _hll_exact_limit:
+            self.registers = bytearray(1 << self.precision)
+            for value in self.values:
+                self._add(value)
+            self.values = None
+
+    def update(self, other):
+        """Merge another sketch of the same precision into this one"""
+        if other.registers is None:
+            for value in other.values:
+                self.add(value)
+            return
+        if self.registers is None:
+            values = self.values
+            self.registers = bytearray(other.registers)
+            self.values = None
+            for value in values:
+                self._add(value)
+            return
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def __len__(self):
+        """The estimated number of distinct ints added"""
+        if self.registers is None:
+            return len(self.values)
+        m = len(self.registers)
+        estimate = (0.7213 / (1 + 1.079 / m)) * m * m / sum(
+            2.0 ** -rank for rank in self.registers
+            )
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)  # Linear counting
+        return round(estimate)
+
+
+class VendorAggregator:
+    """Streaming counts of MACs by vendor, by assignment or both, with
+    optional approximate distinct MAC counts. Counters are keyed on vendor
+    string ids of the index, so memory grows with the number of vendors
+    and assignments seen, not with the input. An optional LookupCache of
+    token: keys lets repeated MACs skip parsing and lookup.
+    """
+
+    def __init__(self, database, by='vendor', distinct=False, cache=None):
+        self.database = database
+        self.by = by
+        self.distinct = distinct
+        self.cache = cache
+        self.total = 0
+        self.vendor_counts = collections.Counter()
+        self.oui_counts = collections.Counter()
+        self.vendor_sketches = collections.defaultdict(HyperLogLog)
+        self.oui_sketches = collections.defaultdict(HyperLogLog)
+        self.total_sketch = HyperLogLog(_hll_total_precision)
+        self._oui_info = {}  # assignment key: (vendor key, registry)
+
+    def _keys(self, parsed):
+        """Takes a ParsedMac or None.
+        Returns (vendor key, assignment key, value) or () if not valid.
+        The assignment key packs the prefix and its length in bits.
+        """
+        if parsed is None:
+            return ()
+        value = parsed.value
+        max_bits = 24 if parsed.kind == 'oui' else 48
+        data = self.database.data
+        if value >> 40 & 3 and classify_mac(value) not in _lookup_classes:
+            # Multicast MACs have no vendor
+            vendor_key, registry, bits = -1, None, 24
+        elif isinstance(data, OuiIndex):
+            match = data.find_prefix(value, max_bits)
+            if match:
+                vendor_key, registry, bits = match
+            else:
+                vendor_key, registry, bits = -1, None, 24
+        else:
+            assignment, registry, vendor = find_int_prefix(
+                value, data, max_bits,
+                )
+            bits = len(assignment) * 4
+            vendor_key = (
+                -1 if vendor == 'unknown' else
+                sys.intern(vendor) if isinstance(vendor, str) else
+                tuple(vendor)
+                )
+        oui_key = (value >> (48 - bits)) << 6 | bits
+        if oui_key not in self._oui_info:
+            self._oui_info[oui_key] = (vendor_key, registry)
+        return vendor_key, oui_key, value
+
+    def add(self, macs):
+        """Count a batch of MAC/OUI str. Returns the queries that are not
+        valid.
+        """
+        cache = self.cache
+        if cache is not None:
+            keys = cache.get_many(macs)
+        else:
+            keys = [None] * len(macs)
+        missing = list(dict.fromkeys(
+            mac for mac, key in zip(macs, keys) if key is None
+            ))
+        if missing:
+            new_keys = dict(zip(missing, map(self._keys, parse_macs(missing))))
+            if cache is not None:
+                cache.put_many(new_keys)
+            if self.distinct:
+                # Tokens seen before add the same values, no need to repeat
+                for entry in filter(None, new_keys.values()):
+                    vendor_key, oui_key, value = entry
+                    self.total_sketch.add(value)
+                    if self.by != 'oui':
+                        self.vendor_sketches[vendor_key].add(value)
+                    if self.by != 'vendor':
+                        self.oui_sketches[oui_key].add(value)
+            keys = [
+                new_keys[mac] if key is None else key
+                for mac, key in zip(macs, keys)
+                ]
+        valid = list(filter(None, keys))
+        self.total += len(valid)
+        if self.by != 'oui':
+            self.vendor_counts.update([key[0] for key in valid])
+        if self.by != 'vendor':
+            self.oui_counts.update([key[1] for key in valid])
+        return [mac for mac, key in zip(macs, keys) if not key]
+
+    def vendor_name(self, vendor_key):
+        """Takes a vendor key. Returns the org name or list of names"""
+        if vendor_key == -1:
+            return 'unknown'
+        elif isinstance(vendor_key, int):
+            return self.database.data.vendor(vendor_key)
+        return vendor_key if isinstance(vendor_key, str) else list(vendor_key)
+
+    def rows(self, top=None):
+        """Returns the summary as tuples of _aggregate_fields, most frequent
+        first: the vendor rows, the assignment rows and a total row.
+        """
+        rows = []
+        for by, counts, sketches in [
+                ('vendor', self.vendor_counts, self.vendor_sketches),
+                ('oui', self.oui_counts, self.oui_sketches),
+                ]:
+            if self.by not in (by, 'both'):
+                continue
+            for key, count in counts.most_common(top):
+                distinct = len(sketches[key]) if self.distinct else None
+                if by == 'vendor':
+                    rows.append((
+                        by, count, distinct, None, None, None,
+                        self.vendor_name(key),
+                        ))
+                    continue
+                bits = key & 63
+                vendor_key, registry = self._oui_info[key]
+                rows.append((
+                    by, count, distinct, f"{key >> 6:0{bits // 4}X}",
+                    registry, bits, self.vendor_name(vendor_key),
+                    ))
+        distinct = len(self.total_sketch) if self.distinct else None
+        rows.append(('total', self.total, distinct, None, None, None, None))
+        return rows
+
+
+def format_aggregate(rows, fmt='text', registry=False, distinct=False):
+    """Takes VendorAggregator rows. Returns a list of summary lines"""
+    if fmt != 'text':
+        return format_rows(rows, _aggregate_fields, fmt)
+    head = f"{'count':>10}  " + (f"{'distinct':>10}  " if distinct else '')
+    lines, last_by = [], None
+    for by, count, num, assignment, reg, bits, vendor in rows:
+        if by != last_by:
+            if lines:
+                lines.append('\n')
+            if by != 'total':
+                name = 'vendor' if by == 'vendor' else 'assignment'
+                lines.append(f"{head}{name}\n")
+            last_by = by
+        num = f"{num:>10}  " if distinct else ''
+        if by == 'vendor':
+            label = vendor
+        elif by == 'oui':
+            prefix = f"{reg or '-'}/{bits}  " if registry else ''
+            label = f"{assignment}  {prefix}{vendor}"
+        else:
+            label = 'total'
+        lines.append(f"{count:>10}  {num}{label}\n")
+    return lines
+
+
+def load_database(database=None):
+    """Takes a database, the default one if None, and loads it.
+    Returns the database, or None after printing an error if it could not
+    be read.
+    """
+    database = database or default_database()
+    if not database.load():
+        print(
+            f"Could not read {database.index_file} or {database.json_file}",
+            file=sys.stderr,
+            )
+        return None
+    return database
+
+
+def display_aggregate(batches, by='vendor', top=None, distinct=False,
+                      database=None, writer=None):
+    """Count the MACs of all batches by vendor and/or assignment.
+    Display only the summary.
+    """
+    database = load_database(database)
+    if database is None:
         return False
-    elif isinstance(file, str):
-        file = pathlib.Path(file)
-    if not file.exists():
-        if not quiet:
-            print(f"Could not open file: `{file}`")
+    writer = writer or ReportWriter()
+    # The cache holds lookup keys here, there are no report lines to keep
+    aggregator = VendorAggregator(database, by, distinct, writer.cache)
+    stats = writer.stats
+    for batch in batches:
+        if stats is not None:
+            stats.start()
+        rejected = aggregator.add(strip_list_items(batch))
+        if stats is not None:
+            stats.stop('aggregate')
+            stats.count(items=len(batch), invalid=len(rejected))
+        if rejected:
+            writer.reject(rejected)
+    writer.fields = _aggregate_fields
+    writer.write_text(''.join(format_aggregate(
+        aggregator.rows(top), writer.fmt, writer.registry, distinct,
+        )))
+    return True
+
+
+def format_vendor_search(found, fmt='text', registry=False,
+                         output='table'):
+    """Takes VendorAssignments and a vendor output style. Returns a list of
+    lines with all fields, or only the unique assignments or prefixes.
+    """
+    if output != 'table':
+        fields = _vendor_outputs[output]
+        values = dict.fromkeys(map(operator.attrgetter(*fields), found))
+        if fmt == 'text':
+            return [f"{value}\n" for value in values]
+        return format_rows(((value,) for value in values), fields, fmt)
+    if fmt != 'text':
+        return format_rows(found, _vendor_fields, fmt)
+    lines = []
+    for item in found:
+        prefix = f"{item.registry or '-'}/{item.bits}  " if registry else ''
+        lines.append(
+            f"{item.assignment:<9}  {item.prefix:<20}  {prefix}{item.vendor}\n"
+            )
+    return lines
+
+
+def display_vendor_search(patterns, output='table', database=None,
+                          writer=None):
+    """Display the assignments of the vendors matching any of the patterns.
+    Return True if any were found.
+    """
+    database = load_database(database)
+    if database is None:
         return False
-    elif not file.stat().st_size:
-        if not quiet:
-            print(f"[WARNING]: No data found in file: `{file}`")
+    writer = writer or ReportWriter()
+    if (stats := writer.stats) is not None:
+        stats.start()
+    found = dict.fromkeys(itertools.chain.from_iterable(
+        map(database.search_vendor, patterns)
+        ))
+    if stats is not None:
+        stats.stop('search')
+        stats.count(items=len(found))
+    if not found:
+        if not writer.quiet:
+            print(
+                f"[WARNING]: No vendor matches "
+                f"{', '.join(f'`{pattern}`' for pattern in patterns)}",
+                file=sys.stderr,
+                )
         return False
-    else:
-        with file.open(encoding='utf-8') as f:
-            data = [line.strip() for line in f]
-    return data
+    found = sorted(found, key=operator.attrgetter('prefix'))
+    writer.fields = _vendor_outputs[output]
+    writer.write_text(''.join(format_vendor_search(
+        found, writer.fmt, writer.registry, output,
+        )))
+    return True
 
 
-def strip_list_items(a_list):
-    """Convert the list or file obj to usable format"""
-    data = [i.strip() for i in a_list]
-    return data
+def display_annotated(chunks, database=None, writer=None):
+    """Display the input text with the vendor after each MAC"""
+    database = load_database(database)
+    if database is None:
+        return False
+    writer = writer or ReportWriter()
+    # The cache holds vendor labels here, there are no report lines to keep
+    stats = writer.stats
+    for chunk in chunks:
+        if stats is not None:
+            stats.start()
+        text = annotate_text(chunk, database, writer.registry, writer.cache)
+        if stats is not None:
+            stats.stop('annotate')
+        writer.write_raw(text)
+    return True
 
 
-def display_report(macs, quiet=False):
-    """Display the table after validating OUIs and MACs"""
-    ouis_dict = read_json_file(_user_json_file)
-    if not ouis_dict:
-        print(f"Could not read {_user_json_file}")
+def display_report_batches(batches, quiet=False, registry=False,
+                           database=None, writer=None):
+    """Display the table for each batch of MACs as soon as it is read"""
+    database = load_database(database)
+    if database is None:
         return False
-    for mac in macs:
-        if is_oui(mac):
-            ieee_oui, std_mac = (
-                std_oui_format(mac, sep='').upper(),
-                std_mac_format(get_oui_as_mac(mac), sep=':').upper(),
-                )
-        elif is_mac(mac):
-            ieee_oui, std_mac = (
-                std_oui_format(get_oui_from_mac(mac), sep='').upper(),
-                std_mac_format(mac, sep=':').upper(),
+    writer = writer or ReportWriter(registry=registry, quiet=quiet)
+    for batch in batches:
+        writer.write_macs(strip_list_items(batch), database)
+    return True
+
+
+def file_byte_ranges(file, size=None):
+    """Input a pathlib file obj. Yield (start, end) byte ranges of about
+    size bytes that begin and end on line boundaries.
+    """
+    size = size or _job_chunk_size
+    total = file.stat().st_size
+    with file.open('rb') as f:
+        start = 0
+        while start < total:
+            f.seek(min(start + size, total))
+            f.readline()
+            end = f.tell()
+            yield start, end
+            start = end
+
+
+# Per process state of --jobs workers
+_worker_database = None
+_worker_cache = None
+
+
+def _init_worker(index_file, json_file, cache_size=0, stats=False,
+                 bundled=False):
+    """Map the index read-only once in each worker process"""
+    global _worker_database, _worker_cache
+    _worker_database = OuiDatabase(index_file, json_file, bundled=bundled)
+    _worker_database.stats = RunStats() if stats else None
+    _worker_database.load()
+    _worker_cache = LookupCache(cache_size) if cache_size else None
+
+
+def _report_file_range(task):
+    """Worker task. Look up one byte range of a file. Returns the report
+    text, the queries that are not valid, the cache counts of the task and
+    what `RunStats.take` returns, or None without stats.
+    """
+    file, start, end, fmt, registry, skip = task
+    if (stats := _worker_database.stats) is not None:
+        stats.start()
+    with open(file, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    macs = [
+        line.strip() for line in
+        data.decode('utf-8', errors='replace').splitlines()
+        ]
+    if skip:
+        macs = skip_macs(macs, skip)
+    if stats is not None:
+        stats.stop('read')
+        stats.count(batches=1, bytes_in=len(data))
+        stats.start()
+    cache = _worker_cache
+    before = cache.counts() if cache is not None else (0, 0, 0)
+    text, rejected = format_macs(macs, _worker_database, fmt, registry, cache)
+    after = cache.counts() if cache is not None else (0, 0, 0)
+    if stats is not None:
+        stats.stop('format')
+        stats.count(items=len(macs), invalid=len(rejected))
+    return (
+        text, rejected, [b - a for a, b in zip(before, after)],
+        stats.take() if stats is not None else None,
+        )
+
+
+def display_report_jobs(files, jobs, quiet=False, registry=False,
+                        ordered=True, writer=None, skip=()):
+    """Display the table for files using a pool of worker processes.
+    The stats of the workers add up to more wall time than the run took.
+    """
+    import multiprocessing
+    writer = writer or ReportWriter(registry=registry, quiet=quiet)
+    database = load_database()
+    if database is None:
+        return False
+    cache_size = writer.cache.maxsize if writer.cache is not None else 0
+    with multiprocessing.Pool(
+            jobs, _init_worker,
+            (database.index_file, database.json_file, cache_size,
+             writer.stats is not None, database.bundled),
+            ) as pool:
+        imap = pool.imap if ordered else pool.imap_unordered
+        for file in files:
+            if not (file := check_input_file(file, quiet)):
+                continue
+            tasks = (
+                (str(file), start, end, writer.fmt, writer.registry, skip)
+                for start, end in file_byte_ranges(file)
                 )
-        else:
-            if not quiet:
-                print(f"[WARNING]: Not a valid MAC/OUI address: `{mac}`")
+            for text, rejected, counts, stats in imap(
+                    _report_file_range, tasks,
+                    ):
+                writer.write_text(text, rejected)
+                if writer.cache is not None:
+                    writer.cache.add_counts(*counts)
+                if stats is not None:
+                    writer.stats.merge(*stats)
+    return True
+
+
+# Daemon protocol, UTF-8 and newline delimited, any number of batches:
+#   client: optional `?registry` / `?format=NAME` lines that apply to the rest
+#           of the connection, then a batch: a count N and N MAC/OUI lines
+#   server: counts M and R on one line, then the M report lines of that
+#           batch and the R queries that are not a valid MAC/OUI
+
+
+def parse_address(address):
+    """Takes a `host:port` or a Unix socket path str.
+    Returns a socket family and a socket address.
+    """
+    import socket
+    host, sep, port = str(address).rpartition(':')
+    if sep and host and port.isdigit() and '/' not in host:
+        return socket.AF_INET, (host.strip('[]'), int(port))
+    return socket.AF_UNIX, str(address)
+
+
+def handle_daemon_client(rfile, wfile, database):
+    """Answer batches of lookups on one client connection"""
+    fmt, registry = 'text', False
+    readline = rfile.readline
+    while (line := readline()):
+        line = line.decode('utf-8', errors='replace').strip()
+        if line == '?registry':
+            registry = True
             continue
-        vendor = find_oui_org(ieee_oui, ouis_dict)
-        if not vendor:
-            # Should not reach this. Lookups should always return 'unknown'
-            print('Vendor not found for: {std_mac}')
-            return False
-        print(f"{std_mac}  {ieee_oui}  {vendor}")
+        elif line.startswith('?format='):
+            fmt = line.partition('=')[2]
+            fmt = fmt if fmt in _output_formats else 'text'
+            continue
+        elif line.startswith('?'):
+            continue  # Unknown options, e.g. `?quiet` of older clients
+        elif not line.isdigit():
+            break
+        macs = [
+            readline().decode('utf-8', errors='replace').strip()
+            for _ in range(int(line))
+            ]
+        database.reload_if_changed()
+        text, rejected = format_results(
+            database.lookup_many(macs), fmt, registry,
+            )
+        reply = ''.join([
+            f"{text.count(chr(10))} {len(rejected)}\n", text,
+            *(f"{query}\n" for query in rejected),
+            ])
+        wfile.write(reply.encode('utf-8'))
+
+
+def make_daemon(address, cache_size=_cache_size):
+    """Create a threaded lookup server listening on address, with an LRU
+    cache of cache_size results
+    """
+    import socket
+    import socketserver
+
+    class LookupHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            handle_daemon_client(self.rfile, self.wfile, self.server.database)
+
+    family, addr = parse_address(address)
+    if family == socket.AF_UNIX:
+        base_class = socketserver.ThreadingUnixStreamServer
+        if os.path.exists(addr) and not connect_daemon(addr):
+            os.unlink(addr)  # Stale socket left by a previous daemon
+        else:
+            pathlib.Path(addr).parent.mkdir(parents=True, exist_ok=True)
+    else:
+        base_class = socketserver.ThreadingTCPServer
+
+    class LookupServer(base_class):
+        daemon_threads = True
+        allow_reuse_address = True
+
+    server = LookupServer(addr, LookupHandler)
+    server.database = OuiDatabase(cache_size=max(cache_size, 0))
+    server.database.load()
+    return server
+
+
+def serve_daemon(address, cache_size=_cache_size):
+    """Answer lookups on address until interrupted"""
+    try:
+        server = make_daemon(address, cache_size)
+    except OSError as err:
+        print(
+            f"[ERROR]: Could not listen on `{address}`: {err}",
+            file=sys.stderr,
+            )
+        return False
+    print(f"Serving OUI lookups on `{address}`. Press Ctrl-C to stop.")
+    with server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print('\nBye.')
+        finally:
+            if isinstance(server.server_address, str):
+                os.unlink(server.server_address)
     return True
 
 
-def interactive_mode():
-    """Enter an interactive mode if no arguments are supplied"""
-    parser = parse_arguments()
-    parser_help = '\n\n'.join(parser.format_help().split('\n\n')[1:-2])
-    interactive_help = "description:\n  " + parser_help + (
-        '\n\n'
-        'interactive commands:\n'
-        f"  {'help':<20}  show this message again\n"
-        f"  {'quit':<20}  exit program\n"
+def connect_daemon(address):
+    """Return a socket connected to the daemon or None if not running"""
+    import socket
+    family, addr = parse_address(address)
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    try:
+        sock.connect(addr)
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def display_report_remote(batches, sock, quiet=False, registry=False,
+                          writer=None):
+    """Display the table for each batch using a running daemon"""
+    writer = writer or ReportWriter(registry=registry, quiet=quiet)
+    with sock, sock.makefile('rb') as rfile, sock.makefile('wb') as wfile:
+        options = [
+            *['?registry'] * writer.registry, f"?format={writer.fmt}",
+            ]
+        for batch in batches:
+            macs = [mac.replace('\n', ' ') for mac in strip_list_items(batch)]
+            request = ''.join(f"{line}\n" for line in [
+                *options, len(macs), *macs,
+                ])
+            options = []
+            if (stats := writer.stats) is not None:
+                stats.start()
+            wfile.write(request.encode('utf-8'))
+            wfile.flush()
+            count, num_rejected = map(int, rfile.readline().split())
+            text = b''.join(rfile.readline() for _ in range(count))
+            rejected = [
+                rfile.readline().decode('utf-8').rstrip('\n')
+                for _ in range(num_rejected)
+                ]
+            if stats is not None:
+                stats.stop('lookup')
+                stats.count(items=len(macs), invalid=len(rejected))
+            writer.write_text(text.decode('utf-8'), rejected)
+    return True
+
+
+def open_report_writer(args):
+    """Return a ReportWriter for the output options in parsed args"""
+    rejects = None
+    if args.rejects:
+        rejects = args.rejects.open('w', encoding='utf-8')
+    cache = LookupCache(args.cache_size) if args.cache_size > 0 else None
+    return ReportWriter(
+        fmt=args.fmt, registry=args.registry, quiet=args.quiet,
+        rejects=rejects, cache=cache, stats=RunStats() if args.stats else None,
         )
-    if not check_user_data_files():
-        parser.print_usage()
-    print("\nEnter MAC/OUI and/or options, 'h' for help, 'q' to quit")
-    reply = shlex.split(input(f"{__script__}> "))
+
+
+def iter_args_batches(args, pipe=None, files=(), stats=None):
+    """Yield batches of MACs from the inputs of parsed args, extracted from
+    free text with `--extract`. Files are followed with `--follow` and the
+    `--skip` groups are dropped. Reading and extracting are timed with an
+    optional RunStats.
+    """
+    if args.extract:
+        chunks = iter_input_chunks(
+            args.macs, pipe, files, args.quiet, args.follow,
+            )
+        if stats is None:
+            batches = iter_extracted_batches(chunks)
+        else:
+            batches = iter_extracted_batches(stats.timed(chunks))
+            batches = stats.timed(batches, 'extract')
+    else:
+        batches = iter_input_batches(
+            args.macs, pipe, files, args.quiet, args.follow,
+            )
+        if stats is not None:
+            batches = stats.timed(batches)
+    if args.skip:
+        batches = (skip_macs(batch, args.skip) for batch in batches)
+    return batches
+
+
+def display_args_report(args, writer, pipe=None, jobs=1):
+    """Display what the parsed args ask for: the vendor search, the
+    annotated text, the aggregate summary or the report of each MAC.
+    """
+    if args.vendor:
+        return display_vendor_search(
+            args.vendor, args.vendor_output, writer=writer,
+            )
+    if args.annotate or args.aggregate or args.extract or args.follow:
+        jobs = 1
+    files = args.files if jobs < 2 else []
+    if args.annotate:
+        chunks = iter_input_chunks(
+            args.macs, pipe, files, args.quiet, args.follow,
+            )
+        if writer.stats is not None:
+            chunks = writer.stats.timed(chunks)
+        return display_annotated(chunks, writer=writer)
+    batches = iter_args_batches(args, pipe, files, writer.stats)
+    if args.aggregate:
+        return display_aggregate(
+            batches, args.aggregate, args.top, args.distinct, writer=writer,
+            )
+    result = display_report_batches(
+        batches, args.quiet, args.registry, writer=writer,
+        )
+    if jobs > 1 and args.files:
+        result = display_report_jobs(
+            args.files, jobs, args.quiet, args.registry,
+            ordered=not args.unordered, writer=writer, skip=args.skip,
+            )
+    return result
+
+
+def display_report(macs, quiet=False, registry=False):
+    """Display the table after validating OUIs and MACs"""
+    return display_report_batches(batched(macs), quiet, registry)
+
+
+def interactive_command(reply, parser, interactive_help):
+    """Run one line of split input of interactive mode.
+    Returns False to quit, else True.
+    """
+    global _default_database
     if not reply:
         return True
     elif reply[0].lower().startswith('q'):
@@ -461,53 +3942,167 @@ def interactive_mode():
     elif reply[0].lower().startswith('h'):
         print(interactive_help)
         return True
-    args = parser.parse_args(reply)
+    try:
+        args = parser.parse_args(reply)
+    except SystemExit:
+        # Bad options or `--help`. argparse has printed the details.
+        return True
     if args.download:
-        if not (download_ieee_oui_csv()
-                and convert_user_csv_file_to_user_json_file()):
-            # Return True restarts interactive mode. False exits prog.
+        if not refresh_ieee_registries():
+            return True
+    if args.compile is not None:
+        if not compile_user_sources(args.compile):
             return True
-    macs = args.macs.copy()
-    for file in args.files:
-        macs_file = read_file_to_list(file, args.quiet)
-        if macs_file:
-            macs.extend(macs_file)
-    macs = strip_list_items(macs)
-    result = display_report(macs, args.quiet)
+    if args.snapshots:
+        display_snapshots()
+        return True
+    if args.snapshot_diff:
+        display_snapshot_diff(*args.snapshot_diff)
+        return True
+    if args.as_of:
+        if not (replaced := use_snapshot(args.as_of)):
+            return True
+    # Only rereads the data when its files changed, e.g. by `--download`
+    default_database().reload_if_changed()
+    try:
+        with open_report_writer(args) as writer:
+            result = display_args_report(args, writer)
+    finally:
+        if args.as_of:
+            # Only this command looks up in the snapshot
+            _default_database = replaced
     return True
 
 
+def interactive_mode():
+    """Enter an interactive mode if no arguments are supplied.
+    The parser is built and the data is loaded once for the session.
+    """
+    import shlex
+    try:
+        # Set interactive mode input history (posix systems only)
+        import readline
+    except ImportError:
+        pass
+    parser = parse_arguments()
+    parser_help = '\n\n'.join(parser.format_help().split('\n\n')[1:-2])
+    interactive_help = "description:\n  " + parser_help + (
+        '\n\n'
+        'interactive commands:\n'
+        f"  {'help':<20}  show this message again\n"
+        f"  {'quit':<20}  exit program\n"
+        )
+    if not check_user_data_files():
+        parser.print_usage()
+    default_database().load()
+    while True:
+        print("\nEnter MAC/OUI and/or options, 'h' for help, 'q' to quit")
+        try:
+            reply = shlex.split(input(f"{__script__}> "))
+        except EOFError:
+            print('\nBye!')
+            return True
+        except ValueError as err:
+            print(f"[ERROR]: {err}")
+            continue
+        if not interactive_command(reply, parser, interactive_help):
+            return True
+
+
+def profile_call(file, func, *args):
+    """Run func(*args) under cProfile, also when it exits, and save the
+    stats to file. Returns what func returns.
+    """
+    import cProfile
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args)
+    finally:
+        profiler.dump_stats(file)
+        print(f"Saved profile to `{file}`", file=sys.stderr)
+
+
 def main():
     """Start of main program"""
     parser = parse_arguments()
-    args = parser.parse_args()
+    args = parse_command_line(parser)
+    if args.profile:
+        return profile_call(args.profile, run_command, parser, args)
+    return run_command(parser, args)
+
+
+def run_command(parser, args):
+    """Do what the parsed command line args ask for"""
     if (shell := args.completion):
         retval = print_completion(shell)
         return True
-    if not any([args.macs, args.files, args.pipe, args.download]):
-        while interactive_mode():
-            continue
-        else:
-            return True
+    if not any([
+            args.macs, args.files, args.pipe, args.download, args.serve,
+            args.vendor, args.compile is not None, args.snapshots,
+            args.snapshot_diff,
+            ]):
+        return interactive_mode()
     if args.download:
-        if not (download_ieee_oui_csv()
-                and convert_user_csv_file_to_user_json_file()):
+        if not refresh_ieee_registries():
             sys.exit(1)
-    if not check_user_data_files():
+    if args.compile is not None:
+        if not compile_user_sources(args.compile):
+            sys.exit(1)
+    if args.snapshots:
+        return display_snapshots()
+    if args.snapshot_diff:
+        if not display_snapshot_diff(*args.snapshot_diff):
+            sys.exit(1)
+        return True
+    if args.as_of:
+        if not use_snapshot(args.as_of):
+            sys.exit(1)
+    remote = args.connect and not (
+        args.aggregate or args.annotate or args.vendor or args.as_of
+        )
+    if remote and (sock := connect_daemon(args.connect)):
+        try:
+            with open_report_writer(args) as writer:
+                batches = iter_args_batches(
+                    args, args.pipe, args.files, writer.stats,
+                    )
+                display_report_remote(
+                    batches, sock, args.quiet, args.registry, writer,
+                    )
+                if writer.stats is not None:
+                    print(writer.stats.report(), file=sys.stderr)
+        except BrokenPipeError:
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            sys.exit(1)
+        except KeyboardInterrupt:
+            sys.exit(130)
+        return True
+    if not args.as_of and not check_user_data_files():
         parser.print_usage()
         sys.exit(1)
-    macs = args.macs.copy()
-    if args.pipe:
-        macs_pipe = read_stdin_to_list(args.pipe)
-        macs.extend(macs_pipe)
-        ## below: reset stdin non-interactive session to interactive again
-        #sys.stdin = open(os.ttyname(sys.stdout.fileno()))
-    for file in args.files:
-        macs_file = read_file_to_list(file, args.quiet)
-        if macs_file:
-            macs.extend(macs_file)
-    macs = strip_list_items(macs)
-    result = display_report(macs, args.quiet)
+    if args.serve:
+        if not serve_daemon(args.serve, args.cache_size):
+            sys.exit(1)
+        return True
+    ## below: reset stdin non-interactive session to interactive again
+    #sys.stdin = open(os.ttyname(sys.stdout.fileno()))
+    try:
+        with open_report_writer(args) as writer:
+            default_database().stats = writer.stats
+            result = display_args_report(
+                args, writer, args.pipe, args.jobs,
+                )
+            if writer.stats is not None:
+                print(writer.stats.report(writer.cache), file=sys.stderr)
+            elif args.cache_stats and writer.cache is not None:
+                print(writer.cache.stats(), file=sys.stderr)
+    except BrokenPipeError:
+        # Output closed early, e.g. piped to `head`. Exit quietly.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+    except KeyboardInterrupt:
+        # How `--follow` is stopped. Exit quietly like `tail -F`.
+        sys.exit(130)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,127 @@
+"""Shared fixtures for the tests: registry CSVs served over local HTTP.
+Nothing leaves 127.0.0.1, so the tests run offline.
+"""
+
+import functools
+import http.server
+import pathlib
+import sys
+import threading
+
+import pytest
+
+project_dir = pathlib.Path(__file__).resolve().parents[1]
+if str(project_dir) not in sys.path:
+    sys.path.insert(0, str(project_dir))
+
+import ouilookup
+
+csv_header = 'Registry,Assignment,Organization Name,Organization Address'
+registry_rows = {
+    'MA-L': [
+        ('E80AB9', 'Cisco Systems, Inc'),
+        ('408432', 'Espressif Inc.'),
+        ('70F8AE', 'Ubiquiti Inc'),
+        ],
+    'MA-M': [
+        ('70B3D5F', 'Raspberry Pi Trading Ltd'),
+        ('8C1F640', 'Juniper Networks'),
+        ],
+    }
+registry_files = {'MA-L': ('oui.csv', 24), 'MA-M': ('mam.csv', 28)}
+
+
+def write_registry_csv(file, registry, rows):
+    """Write an IEEE shaped registry CSV of (assignment, org) rows"""
+    lines = [csv_header] + [
+        f'{registry},{oui},"{org}",Somewhere' for oui, org in rows
+        ]
+    pathlib.Path(file).write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+
+class RegistryServer:
+    """Serves the files of a directory on 127.0.0.1 in a thread.
+    `codes` lists the status code of every response, in order.
+    While `hold` is a threading.Event, requests set `waiting` and are only
+    answered once it is set.
+    """
+
+    def __init__(self, directory):
+        server = self
+        self.directory = pathlib.Path(directory)
+        self.codes = []
+        self.hold = None
+        self.waiting = threading.Event()
+
+        class Handler(http.server.SimpleHTTPRequestHandler):
+            def do_GET(self):
+                if server.hold is not None:
+                    server.waiting.set()
+                    server.hold.wait(10)
+                super().do_GET()
+
+            def log_request(self, code='-', size='-'):
+                server.codes.append(int(code))
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = http.server.ThreadingHTTPServer(
+            ('127.0.0.1', 0),
+            functools.partial(Handler, directory=str(self.directory)),
+            )
+        self.thread = threading.Thread(
+            target=self.httpd.serve_forever, daemon=True,
+            )
+
+    def url(self, name):
+        """Return the URL of a served file"""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/{name}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self.hold is not None:
+            self.hold.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.thread.join()
+
+
+@pytest.fixture
+def registry_server(tmp_path):
+    """Serve the registry CSVs from tmp_path / 'www'"""
+    www = tmp_path / 'www'
+    www.mkdir()
+    for registry, (name, bits) in registry_files.items():
+        write_registry_csv(www / name, registry, registry_rows[registry])
+    with RegistryServer(www) as server:
+        yield server
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Keep the user data files of the run in tmp_path / 'data'"""
+    data = tmp_path / 'data'
+    for name, value in [
+            ('_user_config_dir', data),
+            ('_user_csv_file', data / 'oui.csv'),
+            ('_user_json_file', data / 'oui.json'),
+            ('_user_index_file', data / 'oui.idx'),
+            ('_user_download_file', data / 'downloads.json'),
+            ('_user_sources_file', data / 'sources.json'),
+            ]:
+        monkeypatch.setattr(ouilookup, name, value)
+    return data
+
+
+@pytest.fixture
+def registries(registry_server, data_dir):
+    """Return the registries dict of the served CSVs, saved in data_dir"""
+    return {
+        registry: (data_dir / name, registry_server.url(name), bits)
+        for registry, (name, bits) in registry_files.items()
+        }
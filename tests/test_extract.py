@@ -0,0 +1,31 @@
+"""Finding MACs in free text with `extract_macs`"""
+
+import pytest
+
+import ouilookup
+
+
+@pytest.mark.parametrize('text, macs', [
+    (b'e8:0a:b9:00:c1:a2 dev eth0', ['e8:0a:b9:00:c1:a2']),
+    (b'[E8-0A-B9-00-C1-A2], e80a.b900.c1a2.', [
+        'E8-0A-B9-00-C1-A2', 'e80a.b900.c1a2',
+        ]),
+    (b'link e8:0a:b9:00:c1:a2: up', ['e8:0a:b9:00:c1:a2']),
+    # IPv6 addresses compressed with ::
+    (b'inet6 fe80::e8:0a:b9:00:c1:a2/64', []),
+    (b'2001:db8::12:34:56:78:9a:bc', []),
+    (b'::e8:0a:b9:00:c1:a2', []),
+    (b'e8:0a:b9:00:c1:a2::1', []),
+    # Clock times
+    (b'Jul  7 12:34:56 host e8:0a:b9:00:c1:a2', ['e8:0a:b9:00:c1:a2']),
+    (b'took 00:12:34:56 h', []),
+    # iptables MAC= fields, destination, source and ethertype
+    (b'IN=eth0 OUT= MAC=e8:0a:b9:00:c1:a2:40:84:32:3d:42:b1:08:00 '
+     b'SRC=192.0.2.1', []),
+    # Longer runs of hex groups
+    (b'aa:e8:0a:b9:00:c1:a2', []),
+    (b'e8-0a-b9-00-c1-a2-ff', []),
+    (b'e80a.b900.c1a2.ffff', []),
+    ])
+def test_extract_macs(text, macs):
+    assert ouilookup.extract_macs(text) == macs
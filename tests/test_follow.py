@@ -0,0 +1,91 @@
+"""Following files with `FileFollower` across rotation and truncation"""
+
+import pytest
+
+import ouilookup
+
+
+@pytest.fixture
+def log(tmp_path):
+    file = tmp_path / 'macs.log'
+    file.write_bytes(b'')
+    return file
+
+
+def append(file, data):
+    with file.open('ab') as f:
+        f.write(data)
+
+
+def test_reads_whole_lines_as_appended(log):
+    follower = ouilookup.FileFollower([log], quiet=True)
+    assert follower.read(log) == b''
+    append(log, b'e8:0a:b9:00:c1:a2\n40:84:')
+    assert follower.read(log) == b'e8:0a:b9:00:c1:a2\n'
+    assert follower.read(log) == b''
+    append(log, b'32:3d:42:b1\n')
+    assert follower.read(log) == b'40:84:32:3d:42:b1\n'
+    follower.close()
+
+
+def test_iter_yields_existing_lines(log):
+    append(log, b'e8:0a:b9:00:c1:a2\n')
+    follower = ouilookup.FileFollower([log], quiet=True)
+    chunks = iter(follower)
+    assert next(chunks) == b'e8:0a:b9:00:c1:a2\n'
+    chunks.close()
+    assert not follower._state
+
+
+def test_rotation_reads_old_file_then_new(log, capsys):
+    append(log, b'aa\n')
+    follower = ouilookup.FileFollower([log])
+    assert follower.read(log) == b'aa\n'
+    # Lines written just before the rotation, the last one unfinished
+    append(log, b'bb\ncc')
+    log.rename(log.with_name('macs.log.1'))
+    log.write_bytes(b'dd\n')
+    assert follower.read(log) == b'bb\n'
+    assert follower.read(log) == b'cc\n'
+    assert follower.read(log) == b'dd\n'
+    assert 'File was replaced' in capsys.readouterr().err
+    append(log, b'ee\n')
+    assert follower.read(log) == b'ee\n'
+    follower.close()
+
+
+def test_moved_away_keeps_old_file_until_recreated(log):
+    follower = ouilookup.FileFollower([log], quiet=True)
+    append(log, b'aa\n')
+    assert follower.read(log) == b'aa\n'
+    rotated = log.with_name('macs.log.1')
+    log.rename(rotated)
+    append(rotated, b'bb\n')
+    assert follower.read(log) == b'bb\n'
+    assert follower.read(log) == b''
+    log.write_bytes(b'cc\n')
+    assert follower.read(log) == b''
+    assert follower.read(log) == b'cc\n'
+    follower.close()
+
+
+def test_truncation_reads_from_start(log, capsys):
+    append(log, b'aa\nbb\ncc\n')
+    follower = ouilookup.FileFollower([log])
+    assert follower.read(log) == b'aa\nbb\ncc\n'
+    log.write_bytes(b'dd\n')
+    assert follower.read(log) == b''
+    assert 'File was truncated' in capsys.readouterr().err
+    assert follower.read(log) == b'dd\n'
+    append(log, b'ee\n')
+    assert follower.read(log) == b'ee\n'
+    follower.close()
+
+
+def test_file_that_appears_later(tmp_path):
+    log = tmp_path / 'later.log'
+    follower = ouilookup.FileFollower([log], quiet=True)
+    assert follower.read(log) == b''
+    log.write_bytes(b'aa\n')
+    assert follower.read(log) == b'aa\n'
+    follower.close()
@@ -0,0 +1,123 @@
+"""Refreshing the IEEE registries from a local HTTP server, synchronously
+and through AsyncOuiDatabase.
+"""
+
+import asyncio
+import os
+import threading
+
+import ouilookup
+from conftest import registry_rows, write_registry_csv
+
+
+def part_files(*dirs):
+    """Return the temp download files left in dirs"""
+    return [file for d in dirs for file in d.rglob('*.part')]
+
+
+def test_download_sends_validators(registries, registry_server, data_dir):
+    statuses = ouilookup.download_ieee_registries(registries)
+    assert statuses == {'MA-L': 'modified', 'MA-M': 'modified'}
+    assert registry_server.codes == [200, 200]
+    statuses = ouilookup.download_ieee_registries(registries)
+    assert statuses == {'MA-L': 'not modified', 'MA-M': 'not modified'}
+    assert registry_server.codes == [200, 200, 304, 304]
+    state = ouilookup.read_json_file(data_dir / 'downloads.json')
+    assert all(state[url]['last_modified'] for file, url, bits in
+               registries.values())
+    assert not part_files(data_dir, registry_server.directory)
+
+
+def test_refresh_counts_changes(registries, registry_server, data_dir,
+                                capsys):
+    index_file = data_dir / 'oui.idx'
+    json_file = data_dir / 'oui.json'
+    assert ouilookup.refresh_ieee_registries(
+        registries, index_file, json_file,
+        )
+    err = capsys.readouterr().err
+    assert 'MA-L: 3 added, 0 removed, 0 changed' in err
+    assert 'MA-M: 2 added, 0 removed, 0 changed' in err
+
+    assert ouilookup.refresh_ieee_registries(
+        registries, index_file, json_file,
+        )
+    err = capsys.readouterr().err
+    assert registry_server.codes[-2:] == [304, 304]
+    assert 'MA-L: 0 added, 0 removed, 0 changed' in err
+    assert 'OUI data is up to date.' in err
+
+    mam = registry_server.directory / 'mam.csv'
+    rows = dict(registry_rows['MA-M'])
+    rows['8C1F640'] = 'Juniper Networks, Inc.'
+    rows['001BC50'] = 'Lab Gear'
+    write_registry_csv(mam, 'MA-M', rows.items())
+    mtime = mam.stat().st_mtime + 10
+    os.utime(mam, (mtime, mtime))
+    assert ouilookup.refresh_ieee_registries(
+        registries, index_file, json_file,
+        )
+    err = capsys.readouterr().err
+    assert registry_server.codes[-2:] == [304, 200]
+    assert 'MA-L: 0 added, 0 removed, 0 changed' in err
+    assert 'MA-M: 1 added, 0 removed, 1 changed' in err
+    database = ouilookup.OuiDatabase(index_file, json_file)
+    assert database.lookup('00:1B:C5:01:23:45').vendor == 'Lab Gear'
+    assert database.lookup('8C:1F:64:01:23:45').vendor == (
+        'Juniper Networks, Inc.'
+        )
+    assert ouilookup.read_snapshots(index_file)[-1].assignments == 6
+    assert not part_files(data_dir, registry_server.directory)
+
+
+def test_async_lookups_run_during_refresh(registries, registry_server,
+                                         data_dir):
+    index_file = data_dir / 'oui.idx'
+    json_file = data_dir / 'oui.json'
+    assert ouilookup.refresh_ieee_registries(
+        registries, index_file, json_file,
+        )
+    mam = registry_server.directory / 'mam.csv'
+    write_registry_csv(mam, 'MA-M', [('001BC50', 'Lab Gear')])
+    mtime = mam.stat().st_mtime + 10
+    os.utime(mam, (mtime, mtime))
+    macs = [f"E8:0A:B9:{i >> 8 & 0xff:02X}:{i & 0xff:02X}:00"
+            for i in range(5_000)]
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        database = ouilookup.AsyncOuiDatabase(index_file, json_file)
+        assert await database.load()
+        registry_server.hold = threading.Event()
+        refresh = asyncio.create_task(database.refresh(registries))
+        # The refresh waits in the executor for the held download
+        assert await loop.run_in_executor(
+            None, registry_server.waiting.wait, 10,
+            )
+        ticks = 0
+        done = False
+
+        async def ticker():
+            nonlocal ticks
+            while not done:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        task = asyncio.create_task(ticker())
+        results = await database.lookup_many(macs, chunk_size=500)
+        done = True
+        await task
+        refreshing = not refresh.done()
+        registry_server.hold.set()
+        refreshed = await refresh
+        found = await database.lookup('00:1B:C5:01:23:45')
+        return results, ticks, refreshing, refreshed, found
+
+    results, ticks, refreshing, refreshed, found = asyncio.run(run())
+    assert refreshing
+    assert {result.vendor for result in results} == {'Cisco Systems, Inc'}
+    # The ticker ran between the chunks of lookups
+    assert ticks >= len(macs) // 500
+    assert refreshed
+    assert found.vendor == 'Lab Gear'
+    assert not part_files(data_dir, registry_server.directory)
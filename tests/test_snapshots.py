@@ -0,0 +1,95 @@
+"""The snapshot store: every snapshot replays to the data it was saved
+with, whatever order the snapshots are saved in.
+"""
+
+import pytest
+
+import ouilookup
+
+versions = {
+    'v1': {'MA-L': {'AAAAAA': 'A1', 'BBBBBB': 'B1'}},
+    'v2': {'MA-L': {'AAAAAA': 'A2', 'BBBBBB': 'B1'},
+           'MA-M': {'DDDDDD1': 'D1'}},
+    'v3': {'MA-L': {'AAAAAA': 'A2', 'CCCCCC': 'C1'}},
+    }
+
+
+@pytest.fixture
+def index_file(tmp_path):
+    return tmp_path / 'oui.idx'
+
+
+def save(index_file, version, date):
+    """Write the index of a version and save its snapshot at date"""
+    ouilookup.write_index_file(versions[version], index_file)
+    return ouilookup.save_snapshot(index_file, date)
+
+
+def non_empty(oui_dicts):
+    """Return oui_dicts without the registries left empty"""
+    return {registry: d for registry, d in oui_dicts.items() if d}
+
+
+def assert_replays(index_file, expected):
+    """Check the dates of the store and the data of each snapshot"""
+    snapshots = ouilookup.read_snapshots(index_file)
+    assert [snapshot.date for snapshot in snapshots] == list(expected)
+    for snapshot in snapshots:
+        version = versions[expected[snapshot.date]]
+        oui_dicts = ouilookup.snapshot_dicts(snapshot, index_file)
+        assert non_empty(oui_dicts) == version
+        file = ouilookup.snapshot_index(snapshot, index_file)
+        with ouilookup.OuiIndex(file) as index:
+            assert non_empty(index.to_dicts()) == version
+
+
+def test_snapshots_in_order(index_file):
+    save(index_file, 'v1', '2023-01-01T00:00:00')
+    save(index_file, 'v2', '2024-01-01T00:00:00')
+    save(index_file, 'v1', '2025-01-01T00:00:00')
+    assert_replays(index_file, {
+        '2023-01-01T00:00:00': 'v1',
+        '2024-01-01T00:00:00': 'v2',
+        '2025-01-01T00:00:00': 'v1',
+        })
+
+
+def test_unchanged_data_is_not_saved_again(index_file):
+    first = save(index_file, 'v1', '2023-01-01T00:00:00')
+    assert save(index_file, 'v1', '2024-01-01T00:00:00') == first
+    assert len(ouilookup.read_snapshots(index_file)) == 1
+
+
+def test_snapshot_inserted_out_of_order(index_file):
+    save(index_file, 'v1', '2023-01-01T00:00:00')
+    save(index_file, 'v3', '2025-01-01T00:00:00')
+    save(index_file, 'v2', '2024-01-01T00:00:00')
+    assert_replays(index_file, {
+        '2023-01-01T00:00:00': 'v1',
+        '2024-01-01T00:00:00': 'v2',
+        '2025-01-01T00:00:00': 'v3',
+        })
+
+
+def test_snapshot_of_the_same_date_is_replaced(index_file):
+    save(index_file, 'v1', '2023-01-01T00:00:00')
+    save(index_file, 'v3', '2025-01-01T00:00:00')
+    save(index_file, 'v2', '2024-01-01T00:00:00')
+    save(index_file, 'v1', '2024-01-01T00:00:00')
+    assert_replays(index_file, {
+        '2023-01-01T00:00:00': 'v1',
+        '2024-01-01T00:00:00': 'v1',
+        '2025-01-01T00:00:00': 'v3',
+        })
+
+
+def test_snapshot_index_is_kept(index_file):
+    save(index_file, 'v1', '2023-01-01T00:00:00')
+    save(index_file, 'v2', '2024-01-01T00:00:00')
+    old, new = ouilookup.read_snapshots(index_file)
+    old_file = ouilookup.snapshot_index(old, index_file)
+    new_file = ouilookup.snapshot_index(new, index_file)
+    mtime = old_file.stat().st_mtime_ns
+    assert ouilookup.snapshot_index(old, index_file) == old_file
+    assert old_file.stat().st_mtime_ns == mtime
+    assert old_file.exists() and new_file.exists()